@@ -0,0 +1 @@
+# Offline benchmark and replay harnesses for the notification pipeline
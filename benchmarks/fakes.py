@@ -0,0 +1,340 @@
+"""In-process stand-ins for Discord and MongoDB used by the benchmark harnesses.
+
+Nothing in here touches the network: Discord HTTP calls are recorded by
+``FakeHTTP`` and MongoDB is replaced by ``MemoryCollection`` (or by
+mongomock-motor when it is installed and requested).
+"""
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class CallCounter:
+    """Counts calls by name so a run can report calls per event"""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+
+    def record(self, name: str):
+        self.calls[name] += 1
+
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+
+
+class FakeHTTP(CallCounter):
+    """Records every Discord API call instead of sending it"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.sent: List[Dict[str, Any]] = []
+
+    async def call(self, route: str, **payload):
+        self.record(route)
+        self.sent.append({"route": route, **payload})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+
+# ---------------------------------------------------------------------------
+# Discord model stand-ins
+# ---------------------------------------------------------------------------
+
+class FakeActivity:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class FakeAsset:
+    def __init__(self, url: Optional[str] = None):
+        self.url = url
+
+
+class FakeUser:
+    """Shared shape for users and members (compared by id like discord.py)"""
+
+    def __init__(self, user_id: int, name: str, http: FakeHTTP, guild=None, activity: Optional[str] = None):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.avatar = None
+        self.display_avatar = FakeAsset()
+        self.bot = False
+        self.guild = guild
+        self._http = http
+        self.activity = FakeActivity(activity) if activity else None
+        self.activities = (self.activity,) if self.activity else ()
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return self.id >> 22
+
+    def __str__(self):
+        return self.name
+
+    def with_activity(self, activity: Optional[str]) -> "FakeUser":
+        """Return a copy of this member with a different activity, like a presence snapshot"""
+        return FakeUser(self.id, self.name, self._http, guild=self.guild, activity=activity)
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        await self._http.call("user.send", user_id=self.id, content=content, embed=embed)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, name: str, guild, http: FakeHTTP):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self._http = http
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        await self._http.call("channel.send", channel_id=self.id, content=content, embed=embed)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str):
+        self.id = guild_id
+        self.name = name
+        self.members: List[FakeUser] = []
+        self._members: Dict[int, FakeUser] = {}
+        self.text_channels: List[FakeChannel] = []
+        self.chunked = True
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def add_member(self, member: FakeUser):
+        self.members.append(member)
+        self._members[member.id] = member
+
+    def get_member(self, member_id: int) -> Optional[FakeUser]:
+        return self._members.get(member_id)
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, author: FakeUser, channel: FakeChannel, content: str):
+        self.id = message_id
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild if channel else None
+        self.content = content
+
+
+class FakeBot:
+    """The subset of ``commands.Bot`` that the cogs use outside of command handling"""
+
+    def __init__(self, http: FakeHTTP):
+        self.http_calls = http
+        self.user = FakeUser(1, "GrebBot", http)
+        self.latency = 0.0
+        self._guilds: Dict[int, FakeGuild] = {}
+        self._channels: Dict[int, FakeChannel] = {}
+        self._users: Dict[int, FakeUser] = {}
+        self.cogs: Dict[str, Any] = {}
+
+    @property
+    def guilds(self) -> List[FakeGuild]:
+        return list(self._guilds.values())
+
+    def is_ready(self) -> bool:
+        return True
+
+    def add_guild(self, guild: FakeGuild):
+        self._guilds[guild.id] = guild
+        for channel in guild.text_channels:
+            self._channels[channel.id] = channel
+
+    def add_user(self, user: FakeUser):
+        self._users[user.id] = user
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self._guilds.get(guild_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self._channels.get(channel_id)
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self._users.get(user_id)
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def add_cog(self, cog):
+        self.cogs[cog.qualified_name] = cog
+
+    def listeners_for(self, event: str) -> list:
+        """All cog listeners registered for ``event`` (e.g. ``on_presence_update``)"""
+        found = []
+        for cog in self.cogs.values():
+            for name, method in cog.get_listeners():
+                if name == event:
+                    found.append(method)
+        return found
+
+
+# ---------------------------------------------------------------------------
+# MongoDB stand-ins
+# ---------------------------------------------------------------------------
+
+def _matches(document: Dict, query: Dict) -> bool:
+    for key, value in query.items():
+        if isinstance(value, dict) and "$in" in value:
+            if document.get(key) not in value["$in"]:
+                return False
+        elif document.get(key) != value:
+            return False
+    return True
+
+
+class _AsyncCursor:
+    def __init__(self, documents: Iterable[Dict]):
+        self._iter = iter(list(documents))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return dict(next(self._iter))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    """Equality-filter-only async collection that mimics the Motor calls the bot makes"""
+
+    def __init__(self, counter: CallCounter, name: str):
+        self.name = name
+        self._counter = counter
+        self.documents: List[Dict] = []
+
+    def find(self, query: Optional[Dict] = None, *args, **kwargs):
+        self._counter.record(f"{self.name}.find")
+        query = query or {}
+        return _AsyncCursor(doc for doc in self.documents if _matches(doc, query))
+
+    async def find_one(self, query: Optional[Dict] = None, *args, **kwargs):
+        self._counter.record(f"{self.name}.find_one")
+        query = query or {}
+        for doc in self.documents:
+            if _matches(doc, query):
+                return dict(doc)
+        return None
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        self._counter.record(f"{self.name}.update_one")
+        for doc in self.documents:
+            if _matches(doc, query):
+                doc.update(update.get("$set", {}))
+                for key in update.get("$unset", {}):
+                    doc.pop(key, None)
+                return
+        if upsert:
+            doc = dict(query)
+            doc.update(update.get("$set", {}))
+            self.documents.append(doc)
+
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        self._counter.record(f"{self.name}.insert_many")
+        self.documents.extend(dict(doc) for doc in documents)
+
+    async def insert_one(self, document: Dict):
+        self._counter.record(f"{self.name}.insert_one")
+        self.documents.append(dict(document))
+
+    async def bulk_write(self, requests: List, ordered: bool = True):
+        """UpdateOne requests only, counted as a single call"""
+        self._counter.record(f"{self.name}.bulk_write")
+        for request in requests:
+            query, update, upsert = request._filter, request._doc, request._upsert
+            for doc in self.documents:
+                if _matches(doc, query):
+                    doc.update(update.get("$set", {}))
+                    break
+            else:
+                if upsert:
+                    self.documents.append({**query, **update.get("$set", {})})
+
+
+class MemoryDatabase:
+    """Attribute access to in-process collections, created on first use (for cogs that use ``database.<name>``)"""
+
+    def __init__(self, counter: CallCounter, collections: Dict[str, Any]):
+        self._counter = counter
+        self._collections = dict(collections)
+
+    def __getitem__(self, name: str):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self._counter, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def create_collection(self, name: str, **kwargs):
+        return self[name]
+
+
+class CountingCollection:
+    """Wraps another async collection (e.g. mongomock-motor) and counts calls"""
+
+    def __init__(self, inner, counter: CallCounter, name: str):
+        self._inner = inner
+        self._counter = counter
+        self._name = name
+
+    def __getattr__(self, attr):
+        target = getattr(self._inner, attr)
+        if not callable(target):
+            return target
+
+        def counted(*args, **kwargs):
+            self._counter.record(f"{self._name}.{attr}")
+            return target(*args, **kwargs)
+
+        return counted
+
+
+def make_collections(counter: CallCounter, backend: str = "memory") -> Dict[str, Any]:
+    """Build the subscription collections on the requested in-process backend"""
+    names = ("sea_of_thieves_subscriptions", "dm_subscriptions")
+    if backend == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+
+        database = AsyncMongoMockClient().grebbot_bench
+        return {name: CountingCollection(database[name], counter, name) for name in names}
+    return {name: MemoryCollection(counter, name) for name in names}
+
+
+async def seed_collection(collection, documents: List[Dict]):
+    """Insert seed data without counting it towards the measured run"""
+    inner = getattr(collection, "_inner", None)
+    if inner is not None:
+        if documents:
+            await inner.insert_many(documents)
+    else:
+        collection.documents.extend(dict(doc) for doc in documents)
+
+
+def install_collections(subscription_manager, collections: Dict[str, Any]):
+    """Point a SubscriptionManager at in-process collections instead of Motor"""
+    subscription_manager.subscriptions_collection = collections["sea_of_thieves_subscriptions"]
+    subscription_manager.dm_subscriptions_collection = collections["dm_subscriptions"]
+    # Other cogs reach their collections through the manager's database
+    subscription_manager.database = MemoryDatabase(collections["dm_subscriptions"]._counter, collections)
@@ -0,0 +1,367 @@
+"""Synthetic presence-load benchmark for the notification pipeline.
+
+Builds fake guilds and members, swaps MongoDB for an in-process collection and
+Discord HTTP for a recorder, then drives ``PresenceChanges.on_presence_update``
+(and through it ``SubscriptionManager.notify_sea_of_thieves_activity``) with
+thousands of presence events.
+
+Usage:
+    python -m benchmarks.presence_load                       # run the whole suite
+    python -m benchmarks.presence_load --scenario crew_launch --events 20000
+    python -m benchmarks.presence_load --output bench.json
+    python -m benchmarks.presence_load --baseline bench.json  # fail on regressions
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from benchmarks.fakes import (
+    CallCounter, FakeBot, FakeChannel, FakeGuild, FakeHTTP, FakeUser,
+    install_collections, make_collections, seed_collection,
+)
+from benchmarks.webhook_stub import make_app as make_webhook_stub
+from utils.webhook_delivery import WebhookDelivery
+
+SEA_OF_THIEVES = "Sea of Thieves"
+OTHER_GAMES = ["Minecraft", "Spotify", "Visual Studio Code", "Fortnite", None]
+
+# name -> scenario parameters; every run of a scenario uses the same seed so numbers are comparable
+SCENARIOS: Dict[str, Dict] = {
+    "steady": {
+        "guilds": 20, "members_per_guild": 200, "shared_fraction": 0.1,
+        "subscribed_fraction": 0.5, "dm_subscribers": 5,
+        "events": 5000, "sea_of_thieves_ratio": 0.2, "crew_size": 1,
+    },
+    "crew_launch": {
+        "guilds": 5, "members_per_guild": 100, "shared_fraction": 0.3,
+        "subscribed_fraction": 1.0, "dm_subscribers": 10,
+        "events": 5000, "sea_of_thieves_ratio": 0.5, "crew_size": 5,
+    },
+    "crew_launch_digest": {
+        "guilds": 5, "members_per_guild": 100, "shared_fraction": 0.3,
+        "subscribed_fraction": 1.0, "dm_subscribers": 10,
+        "events": 5000, "sea_of_thieves_ratio": 0.5, "crew_size": 5,
+        "digest_window": 2,
+    },
+    "shared_members": {
+        "guilds": 10, "members_per_guild": 60, "shared_fraction": 0.8,
+        "subscribed_fraction": 1.0, "dm_subscribers": 30,
+        "events": 5000, "sea_of_thieves_ratio": 0.3, "crew_size": 1,
+    },
+    "many_guilds": {
+        "guilds": 500, "members_per_guild": 50, "shared_fraction": 0.2,
+        "subscribed_fraction": 0.3, "dm_subscribers": 2,
+        "events": 5000, "sea_of_thieves_ratio": 0.1, "crew_size": 1,
+    },
+}
+
+
+class World:
+    """Everything a benchmark run needs: fake bot, cogs and call counters"""
+
+    def __init__(self, bot: FakeBot, http: FakeHTTP, db: CallCounter,
+                 memberships: List[Tuple[FakeGuild, FakeUser]]):
+        self.bot = bot
+        self.http = http
+        self.db = db
+        self.memberships = memberships
+        # (guild_id, member_id) -> current activity name
+        self.activity: Dict[Tuple[int, int], Optional[str]] = {}
+
+
+async def build_world(params: Dict, seed: int, backend: str, http_latency: float,
+                      webhook_api_base: Optional[str] = None) -> World:
+    """Create fake guilds, members and subscriptions and load the real cogs against them"""
+    from cogs.guild_settings import DEFAULT_CONFIG, GuildSettings
+    from cogs.play_sessions import PlaySessions
+    from cogs.presenceChanges import PresenceChanges
+    from cogs.subscription_manager import SubscriptionManager
+
+    rng = random.Random(seed)
+    http = FakeHTTP(latency=http_latency)
+    db = CallCounter()
+    bot = FakeBot(http)
+
+    next_id = 10_000
+    users: List[FakeUser] = []
+    memberships: List[Tuple[FakeGuild, FakeUser]] = []
+    subscriptions = []
+    dm_subscriptions = []
+
+    for g in range(params["guilds"]):
+        guild = FakeGuild(100_000 + g, f"guild-{g}")
+        guild.text_channels.append(FakeChannel(200_000 + g, "sea-of-thieves", guild, http))
+
+        for _ in range(params["members_per_guild"]):
+            if users and rng.random() < params["shared_fraction"]:
+                user = rng.choice(users)
+                if guild.get_member(user.id):
+                    continue
+            else:
+                next_id += 1
+                user = FakeUser(next_id, f"sailor-{next_id}", http)
+                users.append(user)
+                bot.add_user(user)
+            member = FakeUser(user.id, user.name, http, guild=guild)
+            guild.add_member(member)
+            memberships.append((guild, member))
+
+        bot.add_guild(guild)
+
+        if rng.random() < params["subscribed_fraction"]:
+            subscriptions.append({
+                "guild_id": str(guild.id),
+                "guild_name": guild.name,
+                "channel_id": guild.text_channels[0].id,
+                "channel_name": guild.text_channels[0].name,
+                "enabled": True,
+                "notify_start": True,
+                "webhook_id": guild.id if webhook_api_base else None,
+                "webhook_token": "benchmark" if webhook_api_base else None,
+            })
+            for member in rng.sample(guild.members, min(params["dm_subscribers"], len(guild.members))):
+                dm_subscriptions.append({"user_id": member.id, "guild_id": str(guild.id), "enabled": True})
+
+    collections = make_collections(db, backend)
+    await seed_collection(collections["sea_of_thieves_subscriptions"], subscriptions)
+    await seed_collection(collections["dm_subscriptions"], dm_subscriptions)
+
+    subscription_manager = SubscriptionManager(bot)
+    install_collections(subscription_manager, collections)
+    if webhook_api_base:
+        subscription_manager.webhook_delivery = WebhookDelivery(api_base=webhook_api_base)
+    bot.add_cog(subscription_manager)
+    guild_settings = GuildSettings(bot)
+    if params.get("digest_window"):
+        for guild in bot.guilds:
+            guild_settings.configs[guild.id] = DEFAULT_CONFIG._replace(digest_window=params["digest_window"])
+    bot.add_cog(guild_settings)
+    bot.add_cog(PresenceChanges(bot))
+    bot.add_cog(PlaySessions(bot))
+
+    return World(bot, http, db, memberships)
+
+
+def generate_events(world: World, params: Dict, seed: int) -> List[Tuple[FakeUser, FakeUser]]:
+    """Build a deterministic list of (before, after) presence pairs"""
+    rng = random.Random(seed + 1)
+    events: List[Tuple[FakeUser, FakeUser]] = []
+    by_guild: Dict[int, List[FakeUser]] = {}
+    for guild, member in world.memberships:
+        by_guild.setdefault(guild.id, []).append(member)
+    guilds = list(by_guild)
+
+    while len(events) < params["events"]:
+        if rng.random() < params["sea_of_thieves_ratio"]:
+            # A crew launching together: several members of one guild start at once
+            guild_members = by_guild[rng.choice(guilds)]
+            crew = rng.sample(guild_members, min(params["crew_size"], len(guild_members)))
+            new_activities = [SEA_OF_THIEVES] * len(crew)
+        else:
+            crew = [rng.choice(world.memberships)[1]]
+            new_activities = [rng.choice(OTHER_GAMES)]
+
+        for member, activity in zip(crew, new_activities):
+            key = (member.guild.id, member.id)
+            before_activity = world.activity.get(key)
+            if before_activity == activity:
+                # Make sure every event is an actual transition
+                activity = None if activity else SEA_OF_THIEVES
+            world.activity[key] = activity
+            events.append((member.with_activity(before_activity), member.with_activity(activity)))
+
+    return events[:params["events"]]
+
+
+def delivery_breakdown(http: FakeHTTP) -> Dict[str, float]:
+    """Average API calls per notified channel and per DM recipient"""
+    channels: Dict[int, int] = {}
+    recipients: Dict[int, int] = {}
+    for call in http.sent:
+        if call["route"] == "channel.send":
+            channels[call["channel_id"]] = channels.get(call["channel_id"], 0) + 1
+        elif call["route"] == "user.send":
+            recipients[call["user_id"]] = recipients.get(call["user_id"], 0) + 1
+    return {
+        "api_calls_per_channel": round(sum(channels.values()) / len(channels), 2) if channels else 0.0,
+        "api_calls_per_recipient": round(sum(recipients.values()) / len(recipients), 2) if recipients else 0.0,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(name: str, params: Dict, seed: int = 1234, backend: str = "memory",
+                       rate: Optional[float] = None, http_latency: float = 0.0,
+                       webhooks: bool = False) -> Dict:
+    """Run one scenario and return its metrics"""
+    webhook_runner = None
+    webhook_api_base = None
+    if webhooks:
+        # Channel notifications go over real HTTP to the local webhook stand-in
+        stub = make_webhook_stub(limit=10_000, per=1.0)
+        webhook_runner = web.AppRunner(stub)
+        await webhook_runner.setup()
+        site = web.TCPSite(webhook_runner, "127.0.0.1", 0)
+        await site.start()
+        port = webhook_runner.addresses[0][1]
+        webhook_api_base = f"http://127.0.0.1:{port}"
+
+    world = await build_world(params, seed, backend, http_latency, webhook_api_base)
+    events = generate_events(world, params, seed)
+    listeners = world.bot.listeners_for("on_presence_update")
+    world.db.reset()
+    world.http.reset()
+
+    latencies: List[float] = []
+
+    async def handle(before, after):
+        # Mirror discord.py: every listener runs as its own task per dispatch
+        t0 = time.perf_counter()
+        await asyncio.gather(*(listener(before, after) for listener in listeners))
+        latencies.append(time.perf_counter() - t0)
+
+    tasks = []
+    interval = 1.0 / rate if rate else 0.0
+    start = time.perf_counter()
+    for i, (before, after) in enumerate(events):
+        tasks.append(asyncio.ensure_future(handle(before, after)))
+        if interval:
+            delay = start + (i + 1) * interval - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+        elif i % 256 == 0:
+            await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    # Deliver whatever digest mode is still holding so its API calls are counted
+    subscription_manager = world.bot.get_cog("SubscriptionManager")
+    await subscription_manager.flush_digests()
+    if webhook_runner:
+        for received in stub["received"]:
+            world.http.record("webhook.execute")
+            world.http.sent.append({"route": "channel.send", "channel_id": received["webhook_id"]})
+        await subscription_manager.webhook_delivery.close()
+        await webhook_runner.cleanup()
+
+    latencies.sort()
+    count = len(events)
+    return {
+        "scenario": name,
+        "events": count,
+        "seconds": round(elapsed, 4),
+        "throughput_eps": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p90": round(percentile(latencies, 90) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "db_calls_per_event": round(world.db.total() / count, 3),
+        "api_calls_per_event": round(world.http.total() / count, 3),
+        **delivery_breakdown(world.http),
+        "db_calls": dict(world.db.calls),
+        "api_calls": dict(world.http.calls),
+    }
+
+
+def print_report(results: List[Dict]):
+    header = (f"{'scenario':<20}{'events':>8}{'ev/s':>11}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+              f"{'db/ev':>8}{'api/ev':>8}{'api/chan':>10}{'api/dm':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['scenario']:<20}{r['events']:>8}{r['throughput_eps']:>11.1f}"
+              f"{lat['p50']:>9.3f}{lat['p90']:>9.3f}{lat['p99']:>9.3f}"
+              f"{r['db_calls_per_event']:>8.3f}{r['api_calls_per_event']:>8.3f}"
+              f"{r.get('api_calls_per_channel', 0):>10.2f}{r.get('api_calls_per_recipient', 0):>8.2f}")
+
+
+def compare_to_baseline(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Return a list of human readable regressions against a previous run"""
+    previous = {r["scenario"]: r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get(r["scenario"])
+        if not old:
+            continue
+        if r["throughput_eps"] < old["throughput_eps"] * (1 - tolerance):
+            regressions.append(f"{r['scenario']}: throughput {old['throughput_eps']} -> {r['throughput_eps']} ev/s")
+        # Call counts are deterministic for a given seed, so any increase is a regression
+        for key in ("db_calls_per_event", "api_calls_per_event"):
+            if r[key] > old[key]:
+                regressions.append(f"{r['scenario']}: {key} {old[key]} -> {r[key]}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline presence-load benchmark for GrebBot")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--events", type=int, help="Override the number of events per scenario")
+    parser.add_argument("--rate", type=float, help="Target events per second (default: as fast as possible)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--backend", choices=["memory", "mongomock"], default="memory",
+                        help="In-process Mongo stand-in (mongomock requires mongomock-motor)")
+    parser.add_argument("--http-latency", type=float, default=0.0,
+                        help="Simulated Discord API latency in seconds")
+    parser.add_argument("--webhooks", action="store_true",
+                        help="Deliver channel notifications through webhooks to a local HTTP stand-in")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative throughput drop before failing (default 0.2)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's own console output")
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(levelname)-7s %(name)s: %(message)s")
+
+    results = []
+    for name in args.scenario or sorted(SCENARIOS):
+        params = dict(SCENARIOS[name])
+        if args.events:
+            params["events"] = args.events
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            result = asyncio.run(run_scenario(name, params, seed=args.seed, backend=args.backend,
+                                              rate=args.rate, http_latency=args.http_latency,
+                                              webhooks=args.webhooks))
+        results.append(result)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ No regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""Replay a recorded gateway stream into the cogs without any network access.
+
+Recordings come from ``main.py`` with ``GATEWAY_RECORD_PATH`` set (see
+``utils/gateway_recorder.py``). The driver rebuilds the guilds and members seen in
+the recording on top of the benchmark fakes, then dispatches every event to the
+matching cog listeners at the original pace, a multiple of it, or flat out.
+
+Usage:
+    python -m benchmarks.replay gateway.ndjson.gz               # real time (1x)
+    python -m benchmarks.replay gateway.ndjson.gz --speed 10
+    python -m benchmarks.replay gateway.ndjson.gz --speed max --output replay.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.fakes import (
+    CallCounter, FakeBot, FakeChannel, FakeGuild, FakeHTTP, FakeMessage, FakeUser,
+    install_collections, make_collections, seed_collection,
+)
+from benchmarks.presence_load import delivery_breakdown, percentile, print_report
+from utils.gateway_recorder import read_recording
+
+# Gateway event -> cog listener name
+LISTENERS = {
+    "PRESENCE_UPDATE": "on_presence_update",
+    "GUILD_MEMBER_ADD": "on_member_join",
+    "GUILD_MEMBER_REMOVE": "on_member_remove",
+    "GUILD_MEMBER_UPDATE": "on_member_update",
+    "MESSAGE_CREATE": "on_message",
+}
+
+
+class ReplayWorld:
+    """Fake bot state rebuilt from the IDs that appear in a recording"""
+
+    def __init__(self, events: List[Dict], subscribed_fraction: float, dm_subscribers: int, seed: int):
+        self.http = FakeHTTP()
+        self.db = CallCounter()
+        self.bot = FakeBot(self.http)
+        self.events = events
+        self.subscribed_fraction = subscribed_fraction
+        self.dm_subscribers = dm_subscribers
+        self.rng = random.Random(seed)
+        # (guild_id, user_id) -> current member snapshot
+        self.members: Dict[Tuple[int, int], FakeUser] = {}
+
+    def _guild(self, guild_id: int) -> FakeGuild:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            guild = FakeGuild(guild_id, f"guild-{guild_id}")
+            guild.text_channels.append(FakeChannel(guild_id + 1, "sea-of-thieves", guild, self.http))
+            self.bot.add_guild(guild)
+        return guild
+
+    def _member(self, guild: FakeGuild, user_id: int) -> FakeUser:
+        member = guild.get_member(user_id)
+        if member is None:
+            member = FakeUser(user_id, f"user-{user_id}", self.http, guild=guild)
+            guild.add_member(member)
+            if not self.bot.get_user(user_id):
+                self.bot.add_user(FakeUser(user_id, member.name, self.http))
+            self.members[(guild.id, user_id)] = member
+        return member
+
+    async def build(self, backend: str):
+        from cogs.auto_responder import AutoResponder
+        from cogs.guild_settings import GuildSettings
+        from cogs.play_sessions import PlaySessions
+        from cogs.presenceChanges import PresenceChanges
+        from cogs.subscription_manager import SubscriptionManager
+
+        for event in self.events:
+            if event.get("g") is not None and event.get("u") is not None:
+                self._member(self._guild(event["g"]), event["u"])
+
+        subscriptions, dm_subscriptions = [], []
+        for guild in self.bot.guilds:
+            if self.rng.random() >= self.subscribed_fraction:
+                continue
+            channel = guild.text_channels[0]
+            subscriptions.append({
+                "guild_id": str(guild.id), "guild_name": guild.name,
+                "channel_id": channel.id, "channel_name": channel.name,
+                "enabled": True, "notify_start": True,
+            })
+            for member in self.rng.sample(guild.members, min(self.dm_subscribers, len(guild.members))):
+                dm_subscriptions.append({"user_id": member.id, "guild_id": str(guild.id), "enabled": True})
+
+        collections = make_collections(self.db, backend)
+        await seed_collection(collections["sea_of_thieves_subscriptions"], subscriptions)
+        await seed_collection(collections["dm_subscriptions"], dm_subscriptions)
+
+        subscription_manager = SubscriptionManager(self.bot)
+        install_collections(subscription_manager, collections)
+        self.bot.add_cog(subscription_manager)
+        self.bot.add_cog(GuildSettings(self.bot))
+        self.bot.add_cog(PresenceChanges(self.bot))
+        self.bot.add_cog(PlaySessions(self.bot))
+        self.bot.add_cog(AutoResponder(self.bot))
+
+    def arguments_for(self, event: Dict) -> Optional[tuple]:
+        """Turn a recorded event into the arguments its listener expects"""
+        kind = event["e"]
+        guild_id, user_id = event.get("g"), event.get("u")
+        if guild_id is None or user_id is None:
+            return None
+        guild = self._guild(guild_id)
+        before = self._member(guild, user_id)
+
+        if kind == "PRESENCE_UPDATE":
+            activities = event.get("a") or []
+            after = before.with_activity(activities[0] if activities else None)
+            self.members[(guild_id, user_id)] = after
+            guild._members[user_id] = after
+            return before, after
+        if kind == "GUILD_MEMBER_UPDATE":
+            return before, before.with_activity(before.activity.name if before.activity else None)
+        if kind in ("GUILD_MEMBER_ADD", "GUILD_MEMBER_REMOVE"):
+            return (before,)
+        if kind == "MESSAGE_CREATE":
+            channel = self.bot.get_channel(event.get("c")) or guild.text_channels[0]
+            content = event.get("p", "") + "x" * max(0, event.get("n", 0) - len(event.get("p", "")))
+            return (FakeMessage(event["t"], before, channel, content),)
+        return None
+
+
+async def replay(path: str, speed: Optional[float], backend: str = "memory",
+                 subscribed_fraction: float = 1.0, dm_subscribers: int = 3, seed: int = 1234) -> Dict:
+    """Replay a recording and return the same metrics as the presence-load benchmark"""
+    events = list(read_recording(path))
+    world = ReplayWorld(events, subscribed_fraction, dm_subscribers, seed)
+    await world.build(backend)
+    world.db.reset()
+    world.http.reset()
+
+    listeners = {kind: world.bot.listeners_for(name) for kind, name in LISTENERS.items()}
+    latencies: List[float] = []
+    per_type: Dict[str, int] = {}
+
+    async def handle(handlers, args):
+        t0 = time.perf_counter()
+        await asyncio.gather(*(handler(*args) for handler in handlers))
+        latencies.append(time.perf_counter() - t0)
+
+    tasks = []
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        handlers = listeners.get(event["e"])
+        args = world.arguments_for(event) if handlers is not None else None
+        per_type[event["e"]] = per_type.get(event["e"], 0) + 1
+        if speed:
+            delay = start + event["t"] / 1000 / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % 256 == 0:
+            await asyncio.sleep(0)
+        if handlers and args is not None:
+            tasks.append(asyncio.ensure_future(handle(handlers, args)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await world.bot.get_cog("SubscriptionManager").flush_digests()
+
+    latencies.sort()
+    count = len(events) or 1
+    return {
+        "scenario": f"replay@{speed:g}x" if speed else "replay@max",
+        "events": len(events),
+        "event_types": per_type,
+        "seconds": round(elapsed, 4),
+        "throughput_eps": round(len(events) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p90": round(percentile(latencies, 90) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "db_calls_per_event": round(world.db.total() / count, 3),
+        "api_calls_per_event": round(world.http.total() / count, 3),
+        **delivery_breakdown(world.http),
+        "db_calls": dict(world.db.calls),
+        "api_calls": dict(world.http.calls),
+    }
+
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded gateway stream into GrebBot's cogs")
+    parser.add_argument("recording", help="File written with GATEWAY_RECORD_PATH")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="Replay speed multiplier such as 1, 10 or 'max' (default 1)")
+    parser.add_argument("--backend", choices=["memory", "mongomock"], default="memory")
+    parser.add_argument("--subscribed-fraction", type=float, default=1.0,
+                        help="Fraction of recorded guilds that get a channel subscription")
+    parser.add_argument("--dm-subscribers", type=int, default=3,
+                        help="DM subscribers per subscribed guild")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's own console output")
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(levelname)-7s %(name)s: %(message)s")
+
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        result = asyncio.run(replay(args.recording, args.speed, backend=args.backend,
+                                    subscribed_fraction=args.subscribed_fraction,
+                                    dm_subscribers=args.dm_subscribers, seed=args.seed))
+
+    print_report([result])
+    print("Event mix: " + ", ".join(f"{k}={v}" for k, v in sorted(result["event_types"].items())))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
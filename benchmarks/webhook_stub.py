@@ -0,0 +1,67 @@
+"""Local stand-in for Discord's webhook execution endpoint.
+
+Accepts ``POST /webhooks/<id>/<token>``, records the payloads and emulates
+per-webhook rate limits (``X-RateLimit-*`` headers and 429 responses). Webhook
+IDs listed with ``--deleted`` answer 404 like a deleted webhook.
+
+Usage:
+    python -m benchmarks.webhook_stub --port 8765 --limit 5 --per 2
+    DISCORD_WEBHOOK_API_BASE=http://127.0.0.1:8765 python -m benchmarks.presence_load ...
+"""
+import argparse
+import time
+from typing import Dict, List, Set
+
+from aiohttp import web
+
+
+def make_app(limit: int = 5, per: float = 2.0, deleted: Set[int] = frozenset()) -> web.Application:
+    """Build the stand-in app; ``app['received']`` collects every accepted payload"""
+    windows: Dict[int, List[float]] = {}
+    received: List[Dict] = []
+
+    async def execute(request: web.Request) -> web.Response:
+        webhook_id = int(request.match_info["webhook_id"])
+        if webhook_id in deleted:
+            return web.json_response({"message": "Unknown Webhook", "code": 10015}, status=404)
+
+        now = time.monotonic()
+        window = [t for t in windows.get(webhook_id, []) if now - t < per]
+        if len(window) >= limit:
+            retry_after = per - (now - window[0])
+            windows[webhook_id] = window
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+                status=429,
+                headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": f"{retry_after:.3f}"},
+            )
+
+        window.append(now)
+        windows[webhook_id] = window
+        received.append({"webhook_id": webhook_id, "payload": await request.json()})
+        reset_after = per - (now - window[0])
+        return web.Response(status=204, headers={
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(limit - len(window)),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+        })
+
+    app = web.Application()
+    app["received"] = received
+    app.router.add_post("/webhooks/{webhook_id}/{token}", execute)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Discord webhook stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--limit", type=int, default=5, help="Requests allowed per window")
+    parser.add_argument("--per", type=float, default=2.0, help="Window length in seconds")
+    parser.add_argument("--deleted", type=int, action="append", default=[], help="Webhook IDs that answer 404")
+    args = parser.parse_args()
+    web.run_app(make_app(args.limit, args.per, set(args.deleted)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
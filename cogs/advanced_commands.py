@@ -84,7 +84,8 @@ class AdvancedCommands(commands.Cog):
         number = int(number)
         n = number
 
-        if IsPrime(n):
+        # CPU-bound: run it off the event loop
+        if await asyncio.to_thread(IsPrime, n):
             await ctx.send(f"The prime number {n} is prime.")
         else:
             await ctx.send(f"The prime number {n} is not prime.")
@@ -0,0 +1,257 @@
+import discord
+import logging
+import re
+from discord.ext import commands
+from typing import Dict, List, Optional, Tuple
+
+from utils.cog_state import take_state
+
+logger = logging.getLogger(__name__)
+
+# Built-in responders every guild gets unless it overrides the same trigger
+DEFAULT_TRIGGERS = [
+    {"trigger": "hello", "response": "Hello {mention}!", "match": "exact"},
+    {"trigger": "ping", "response": "Pong!", "match": "exact"},
+]
+
+MATCH_TYPES = ("exact", "contains")
+
+
+class TriggerMatcher:
+    """Compiled matcher for one guild's triggers.
+
+    Exact triggers live in a dict keyed by the lowercased trigger, guarded by a
+    length and first-character prefilter so most messages are rejected without
+    lowercasing them. Contains triggers are folded into a single alternation
+    regex, so the cost of a message does not grow with the number of triggers.
+    """
+
+    def __init__(self, triggers: List[Dict]):
+        self.exact: Dict[str, str] = {}
+        self.contains: Dict[str, str] = {}
+        for trigger in triggers:
+            key = trigger["trigger"].lower()
+            target = self.contains if trigger.get("match") == "contains" else self.exact
+            target[key] = trigger["response"]
+
+        self._exact_lengths = frozenset(len(key) for key in self.exact)
+        self._exact_first_chars = frozenset(key[0] for key in self.exact if key)
+
+        self._contains_min_length = min((len(key) for key in self.contains), default=0)
+        self._contains_pattern: Optional[re.Pattern] = None
+        # Trigger of each named group (t0, t1, ...) in the alternation. Looked up by group name because
+        # IGNORECASE matches text that doesn't lowercase back to the trigger ('Kiſs' for 'kiss')
+        self._contains_keys: List[str] = sorted(self.contains, key=len, reverse=True)
+        if self.contains:
+            # Longest first so overlapping triggers prefer the most specific one
+            alternation = "|".join(f"(?P<t{i}>{re.escape(key)})" for i, key in enumerate(self._contains_keys))
+            self._contains_pattern = re.compile(alternation, re.IGNORECASE)
+
+    def match(self, content: str) -> Optional[Tuple[str, str]]:
+        """Return (trigger, response) for the first matching trigger, if any"""
+        length = len(content)
+        if length in self._exact_lengths and content[:1].lower() in self._exact_first_chars:
+            key = content.lower()
+            response = self.exact.get(key)
+            if response is not None:
+                return key, response
+
+        if self._contains_pattern is not None and length >= self._contains_min_length:
+            found = self._contains_pattern.search(content)
+            if found:
+                key = self._contains_keys[int(found.lastgroup[1:])]
+                return key, self.contains[key]
+        return None
+
+
+class AutoResponder(commands.Cog):
+    """Per-guild automatic replies to trigger phrases"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # {guild_id: [trigger documents]} mirrored from MongoDB
+        self.guild_triggers: Dict[int, List[Dict]] = {}
+        # {guild_id: compiled matcher}; guilds without custom triggers share default_matcher
+        self.matchers: Dict[int, TriggerMatcher] = {}
+        self.default_matcher = TriggerMatcher(DEFAULT_TRIGGERS)
+        self.loaded = False
+
+        # After a reload the triggers are handed over instead of being queried again
+        state = take_state(bot, self)
+        if state:
+            for doc in state.get("triggers", []):
+                self.guild_triggers.setdefault(int(doc["guild_id"]), []).append(doc)
+            for guild_id in self.guild_triggers:
+                self._compile(guild_id)
+            self.loaded = state.get("loaded", True)
+
+    def export_state(self) -> Dict:
+        return {"loaded": self.loaded,
+                "triggers": [doc for triggers in self.guild_triggers.values() for doc in triggers]}
+
+    @property
+    def collection(self):
+        """The auto responder collection, shared with the SubscriptionManager's database"""
+        subscription_manager = self.bot.get_cog('SubscriptionManager')
+        if subscription_manager is None:
+            return None
+        return subscription_manager.database.auto_responders
+
+    def _compile(self, guild_id: int):
+        """Rebuild the matcher for a guild after its triggers changed"""
+        triggers = self.guild_triggers.get(guild_id)
+        if not triggers:
+            self.matchers.pop(guild_id, None)
+            return
+        custom = {t["trigger"].lower() for t in triggers}
+        merged = [t for t in DEFAULT_TRIGGERS if t["trigger"] not in custom] + triggers
+        self.matchers[guild_id] = TriggerMatcher(merged)
+
+    async def load_triggers(self):
+        """Load every guild's triggers in one query and compile the matchers"""
+        collection = self.collection
+        if collection is None:
+            return
+        try:
+            guild_triggers: Dict[int, List[Dict]] = {}
+            async for doc in collection.find({}, {"_id": 0}):
+                guild_triggers.setdefault(int(doc["guild_id"]), []).append(doc)
+        except Exception as e:
+            logger.error(f"Error loading auto responder triggers: {e}")
+            return
+
+        self.guild_triggers = guild_triggers
+        self.matchers = {}
+        for guild_id in guild_triggers:
+            self._compile(guild_id)
+        self.loaded = True
+        logger.info(f"Loaded auto responder triggers for {len(guild_triggers)} guild(s)")
+
+    def matcher_for(self, guild: Optional[discord.Guild]) -> TriggerMatcher:
+        if guild is None:
+            return self.default_matcher
+        return self.matchers.get(guild.id, self.default_matcher)
+
+    async def cog_load(self):
+        # Loaded before the gateway connects, like guild settings; on_ready retries if this failed
+        if not self.loaded:
+            await self.load_triggers()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self.loaded:
+            await self.load_triggers()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Reply to messages that match one of the guild's triggers"""
+        if message.author.bot:
+            return
+
+        found = self.matcher_for(message.guild).match(message.content)
+        if found is None:
+            return
+
+        trigger, response = found
+        await message.channel.send(response.replace("{mention}", message.author.mention))
+        logger.debug(f"Auto responder '{trigger}' fired", extra={'sample': 'autoresponder'})
+
+    async def _save_trigger(self, guild_id: int, trigger: str, response: str, match: str):
+        doc = {"guild_id": str(guild_id), "trigger": trigger.lower(), "response": response, "match": match}
+        collection = self.collection
+        if collection is not None:
+            await collection.update_one(
+                {"guild_id": doc["guild_id"], "trigger": doc["trigger"]},
+                {"$set": doc},
+                upsert=True
+            )
+        triggers = [t for t in self.guild_triggers.get(guild_id, []) if t["trigger"] != doc["trigger"]]
+        triggers.append(doc)
+        self.guild_triggers[guild_id] = triggers
+        self._compile(guild_id)
+
+    async def _add(self, ctx, trigger: str, response: str, match: str):
+        trigger = trigger.strip()
+        if not trigger:
+            await ctx.send("❌ The trigger can't be empty.")
+            return
+        try:
+            await self._save_trigger(ctx.guild.id, trigger, response, match)
+        except Exception as e:
+            logger.error(f"Error saving auto responder for guild {ctx.guild.id}: {e}")
+            await ctx.send("❌ Could not save the auto responder, please try again later.")
+            return
+
+        embed = discord.Embed(
+            title="💬 Auto Responder Added",
+            description=f"I'll reply when a message {'contains' if match == 'contains' else 'is'} **{trigger}**.",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Response", value=response[:1024], inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='autorespond_add')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def autorespond_add_command(self, ctx, trigger: str, *, response: str):
+        """
+        Reply with <response> when a message is exactly <trigger> (case-insensitive)
+        Usage: !autorespond_add "<trigger>" <response>  ({mention} mentions the author)
+        """
+        await self._add(ctx, trigger, response, "exact")
+
+    @commands.command(name='autorespond_contains')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def autorespond_contains_command(self, ctx, trigger: str, *, response: str):
+        """
+        Reply with <response> when a message contains <trigger> (case-insensitive)
+        Usage: !autorespond_contains "<trigger>" <response>
+        """
+        await self._add(ctx, trigger, response, "contains")
+
+    @commands.command(name='autorespond_remove')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def autorespond_remove_command(self, ctx, *, trigger: str):
+        """Remove an auto responder from this server"""
+        guild_id = ctx.guild.id
+        key = trigger.strip().lower()
+        triggers = self.guild_triggers.get(guild_id, [])
+        if not any(t["trigger"] == key for t in triggers):
+            await ctx.send(f"❌ No auto responder for **{trigger}** in this server.")
+            return
+
+        try:
+            collection = self.collection
+            if collection is not None:
+                await collection.delete_one({"guild_id": str(guild_id), "trigger": key})
+        except Exception as e:
+            logger.error(f"Error removing auto responder for guild {guild_id}: {e}")
+            await ctx.send("❌ Could not remove the auto responder, please try again later.")
+            return
+
+        self.guild_triggers[guild_id] = [t for t in triggers if t["trigger"] != key]
+        self._compile(guild_id)
+        await ctx.send(f"✅ Removed the auto responder for **{trigger}**.")
+
+    @commands.command(name='autorespond_list')
+    @commands.guild_only()
+    async def autorespond_list_command(self, ctx):
+        """List the auto responders active in this server"""
+        matcher = self.matcher_for(ctx.guild)
+        lines = [f"`{key}` → {response}" for key, response in matcher.exact.items()]
+        lines += [f"`*{key}*` → {response}" for key, response in matcher.contains.items()]
+
+        embed = discord.Embed(
+            title="💬 Auto Responders",
+            description="\n".join(lines)[:4000] if lines else "No auto responders configured.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text="`*trigger*` matches anywhere in a message")
+        await ctx.send(embed=embed)
+
+
+# Setup function to add the cog to the bot
+async def setup(bot):
+    await bot.add_cog(AutoResponder(bot))
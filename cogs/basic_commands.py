@@ -1,5 +1,8 @@
 import discord
 from discord.ext import commands
+from typing import List
+
+from utils.help_catalog import help_catalog
 
 
 
@@ -54,49 +57,23 @@ class BasicCommands(commands.Cog):
         """Command: !help_commands - Shows all available commands"""
         embed = discord.Embed(
             title="🤖 GrebBot Commands",
-            description="Here are all the available commands:",
+            description="Here are all the available commands (🛡️ needs Manage Server):",
             color=discord.Color.blue()
         )
-        
-        # Basic Commands
-        embed.add_field(
-            name="📝 Basic Commands",
-            value="`!hello` - Greet the bot\n"
-                  "`!ping` - Check bot latency\n"
-                  "`!info` - Show bot information\n"
-                  "`!say <message>` - Make the bot say something\n"
-                  "`!echo <message>` - Echo a message back\n"
-                  "`!help_commands` - Show this help menu",
-            inline=False
-        )
-        
-        # Admin Commands
-        embed.add_field(
-            name="🛡️ Admin Commands (Manage Server)",
-            value="`!subscribe [#channel]` - Subscribe to Sea of Thieves notifications\n"
-                  "`!unsubscribe` - Unsubscribe from notifications\n"
-                  "`!subscription_status` - Check subscription status\n"
-                  "`!cooldown_status [member]` - Check cooldown status\n"
-                  "`!reset_cooldown <member>` - Reset member cooldown",
-            inline=False
-        )
-        
-        # DM Commands
-        embed.add_field(
-            name="📬 DM Commands (Any User)",
-            value="`!dm_subscribe` - Get DMs when notifications are sent in this server\n"
-                  "`!dm_unsubscribe` - Stop getting DMs for this server\n"
-                  "`!dm_status` - Check your DM subscription status",
-            inline=False
-        )
-        
-        # Advanced Commands
-        embed.add_field(
-            name="⚙️ Advanced Commands (Manage Server)",
-            value="`!serverinfo` - Show detailed server information",
-            inline=False
-        )
-        
+
+        # Built from the loaded commands once and cached until a cog is reloaded
+        prefix = ctx.clean_prefix
+        for category, infos in help_catalog.by_category(self.bot).items():
+            lines = [f"`{prefix}{info.usage}` - {info.description}{' 🛡️' if info.admin_only else ''}" for info in infos]
+            # Embed fields hold at most 1024 characters
+            chunk: List[str] = []
+            for line in lines:
+                if chunk and len("\n".join(chunk + [line])) > 1024:
+                    embed.add_field(name=category, value="\n".join(chunk), inline=False)
+                    chunk = []
+                chunk.append(line[:1024])
+            embed.add_field(name=category, value="\n".join(chunk), inline=False)
+
         embed.set_footer(text="🏴‍☠️ GrebBot automatically detects when you start playing Sea of Thieves!")
         
         await ctx.send(embed=embed)
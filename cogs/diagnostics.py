@@ -0,0 +1,125 @@
+import asyncio
+import discord
+import logging
+import os
+from discord.ext import commands
+
+from utils.cog_state import reload_extension, resolve_extension
+from utils.help_catalog import help_catalog
+from utils.memory_diagnostics import memory_diagnostics
+from utils.profiler import MAX_DURATION, profiler
+
+logger = logging.getLogger(__name__)
+
+
+class Diagnostics(commands.Cog):
+    """Owner-only tools for investigating a live instance"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        # Bot-wide diagnostics are for the bot owner, not server admins
+        return await self.bot.is_owner(ctx.author)
+
+    @commands.command(name='profile', hidden=True)
+    async def profile_command(self, ctx, seconds: int = 10):
+        """
+        Sample every thread's stack for <seconds> and upload a flame-graph-ready file
+        Usage: !profile [seconds]
+        """
+        if not 1 <= seconds <= MAX_DURATION:
+            await ctx.send(f"❌ Profile for between 1 and {MAX_DURATION} seconds.")
+            return
+        if not profiler.start(seconds):
+            await ctx.send("❌ A profile is already running.")
+            return
+
+        await ctx.send(f"🔬 Profiling for {seconds}s...")
+        await asyncio.to_thread(profiler.wait)
+        result = profiler.last_result
+        if result is None:
+            await ctx.send("❌ The profile failed, see the logs.")
+            return
+
+        embed = discord.Embed(title="🔬 Profile", color=discord.Color.blue())
+        embed.add_field(name="Samples", value=str(result["samples"]), inline=True)
+        embed.add_field(name="Threads", value=str(len(result["threads"])), inline=True)
+        hottest = [f"`{entry['percent']:>5}%` {entry['thread']}: {entry['function']}"
+                   for entry in result["top_self"][:10]]
+        embed.add_field(name="Hottest (self time)", value="\n".join(hottest)[:1024] or "No samples", inline=False)
+        embed.set_footer(text="Open the attached file with speedscope or flamegraph.pl")
+        await ctx.send(embed=embed, file=discord.File(result["path"], filename=os.path.basename(result["path"])))
+
+    @commands.command(name='memdiag', hidden=True)
+    async def memdiag_command(self, ctx, action: str = "status", *names: str):
+        """
+        Memory diagnostics: allocation snapshots, diffs and live object counts
+        Usage: !memdiag [status|start|snapshot <name>|diff <before> <after>|types|stop]
+        """
+        action = action.lower()
+        embed = discord.Embed(title="🧠 Memory Diagnostics", color=discord.Color.blue())
+
+        if action == "start":
+            memory_diagnostics.start()
+            embed.description = "Tracing allocations. Take snapshots with `!memdiag snapshot <name>`."
+        elif action == "stop":
+            memory_diagnostics.stop()
+            embed.description = "Stopped tracing and dropped all snapshots."
+        elif action == "snapshot":
+            summary = await asyncio.to_thread(memory_diagnostics.snapshot, names[0] if names else None)
+            embed.description = (f"Snapshot **{summary['name']}**: {summary['traced_mb']} MB traced, "
+                                 f"{summary['objects']} live objects")
+        elif action == "diff":
+            if len(names) != 2:
+                await ctx.send("❌ Usage: `!memdiag diff <before> <after>`")
+                return
+            try:
+                diff = await asyncio.to_thread(memory_diagnostics.diff, names[0], names[1])
+            except KeyError as e:
+                await ctx.send(f"❌ {e.args[0]}")
+                return
+            embed.description = f"**{names[0]}** → **{names[1]}**: {diff['traced_diff_mb']:+} MB traced"
+            allocations = [f"`{a['size_diff_kb']:+.1f} KB` ({a['count_diff']:+}) {a['where']}"
+                           for a in diff["allocations"][:8]]
+            embed.add_field(name="Top Growth by Line", value="\n".join(allocations)[:1024] or "None", inline=False)
+            types = [f"`{t['diff']:+}` {t['type']} ({t['count']})" for t in diff["type_growth"][:8]]
+            embed.add_field(name="Top Growth by Type", value="\n".join(types)[:1024] or "None", inline=False)
+        elif action == "types":
+            counts = await asyncio.to_thread(memory_diagnostics.object_counts)
+            embed.description = "\n".join(f"`{count:>9}` {name}" for name, count in counts.items())[:4096]
+        else:
+            status = memory_diagnostics.status()
+            embed.add_field(name="Tracing", value="✅" if status["tracing"] else "❌", inline=True)
+            embed.add_field(name="Traced", value=f"{status['traced_mb']} MB (peak {status['peak_mb']} MB)", inline=True)
+            embed.add_field(name="GC Generations", value=str(status["gc_counts"]), inline=True)
+            snapshots = ", ".join(s["name"] for s in status["snapshots"]) or "None"
+            embed.add_field(name="Snapshots", value=snapshots, inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='reload', hidden=True)
+    async def reload_command(self, ctx, cog: str):
+        """
+        Reload a cog's code in place, keeping its in-memory state (cooldowns, sessions, ...)
+        Usage: !reload <cog>  (e.g. subscription_manager or SubscriptionManager)
+        """
+        extension = resolve_extension(self.bot, cog)
+        if extension is None:
+            await ctx.send(f"❌ No loaded cog or extension called `{cog}`.")
+            return
+        try:
+            kept = await reload_extension(self.bot, extension)
+        except commands.ExtensionError as e:
+            logger.exception(f"Reloading {extension} failed: {e}")
+            await ctx.send(f"❌ Reloading `{extension}` failed, the previous version is still running: {e}")
+            return
+        finally:
+            # The command set may have changed either way
+            help_catalog.invalidate()
+        kept_text = f" State kept for {', '.join(kept)}." if kept else ""
+        await ctx.send(f"🔄 Reloaded `{extension}`.{kept_text}")
+
+
+# Setup function to add the cog to the bot
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
@@ -0,0 +1,243 @@
+import asyncio
+import discord
+import logging
+import os
+from discord.ext import commands
+from typing import Dict, FrozenSet, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() in ['true', '1', 'yes']
+
+DEFAULT_PREFIX = '$' if DEBUG_MODE else '!'
+DEFAULT_TRACKED_GAMES = frozenset({"sea of thieves"})
+DEFAULT_NOTIFICATION_TITLE = "⚓ Ahoy you fucks!"
+DEFAULT_NOTIFICATION_MESSAGE = "🏴‍☠️ **{player}** has set sail in **{game}**!"
+DEFAULT_COOLDOWN = 120  # seconds
+DEFAULT_DIGEST_WINDOW = 0  # seconds; 0 sends every notification immediately
+MAX_DIGEST_WINDOW = 300
+
+MAX_PREFIX_LENGTH = 5
+
+
+class GuildConfig(NamedTuple):
+    """Resolved settings for one guild (immutable so readers never see a half-applied edit)"""
+    prefix: str = DEFAULT_PREFIX
+    tracked_games: FrozenSet[str] = DEFAULT_TRACKED_GAMES
+    notification_title: str = DEFAULT_NOTIFICATION_TITLE
+    notification_message: str = DEFAULT_NOTIFICATION_MESSAGE
+    cooldown: int = DEFAULT_COOLDOWN
+    digest_window: int = DEFAULT_DIGEST_WINDOW
+
+
+DEFAULT_CONFIG = GuildConfig()
+
+
+def render_template(template: str, **values: str) -> str:
+    """Fill {player}, {game} and {server} placeholders without str.format's attribute access"""
+    for key, value in values.items():
+        template = template.replace("{" + key + "}", value)
+    return template
+
+
+def config_from_document(doc: Dict) -> GuildConfig:
+    games = doc.get("tracked_games")
+    return GuildConfig(
+        prefix=doc.get("prefix") or DEFAULT_PREFIX,
+        tracked_games=frozenset(g.lower() for g in games) if games else DEFAULT_TRACKED_GAMES,
+        notification_title=doc.get("notification_title") or DEFAULT_NOTIFICATION_TITLE,
+        notification_message=doc.get("notification_message") or DEFAULT_NOTIFICATION_MESSAGE,
+        cooldown=int(doc.get("cooldown", DEFAULT_COOLDOWN)),
+        digest_window=int(doc.get("digest_window", DEFAULT_DIGEST_WINDOW)),
+    )
+
+
+class GuildSettings(commands.Cog):
+    """Per-guild settings (prefix, tracked games, notification text, cooldown) held in memory"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # {guild_id: GuildConfig}; guilds that never changed a setting are absent and use DEFAULT_CONFIG
+        self.configs: Dict[int, GuildConfig] = {}
+        # Retries the bulk load until it succeeds when MongoDB was unreachable at startup
+        self._load_task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        """The guild settings collection, shared with the SubscriptionManager's database"""
+        subscription_manager = self.bot.get_cog('SubscriptionManager')
+        if subscription_manager is None:
+            return None
+        return subscription_manager.database.guild_settings
+
+    async def cog_load(self):
+        # Loaded before the gateway connects so the first message already sees the right prefix
+        if not await self.load_all():
+            self._load_task = asyncio.create_task(self._load_until_done())
+
+    async def cog_unload(self):
+        if self._load_task:
+            self._load_task.cancel()
+
+    async def _load_until_done(self):
+        """Until the first load succeeds every guild runs on the defaults, so keep trying"""
+        while not await self.load_all():
+            subscription_manager = self.bot.get_cog('SubscriptionManager')
+            await asyncio.sleep(subscription_manager.mongo_health.interval if subscription_manager else 15)
+
+    async def load_all(self) -> bool:
+        """Load every guild's settings in a single query; False if the database couldn't be read"""
+        collection = self.collection
+        if collection is None:
+            return False
+        try:
+            configs = {}
+            async for doc in collection.find({}, {"_id": 0}):
+                configs[int(doc["guild_id"])] = config_from_document(doc)
+        except Exception as e:
+            logger.error(f"Error loading guild settings: {e}")
+            return False
+        self.configs = configs
+        logger.info(f"Loaded settings for {len(configs)} guild(s)")
+        return True
+
+    async def invalidate(self, guild_id: int):
+        """Reload one guild's settings from the database (e.g. after an external edit)"""
+        collection = self.collection
+        if collection is None:
+            return
+        doc = await collection.find_one({"guild_id": str(guild_id)}, {"_id": 0})
+        if doc:
+            self.configs[guild_id] = config_from_document(doc)
+        else:
+            self.configs.pop(guild_id, None)
+
+    def get(self, guild_id: Optional[int]) -> GuildConfig:
+        """O(1) lookup used on every message and presence event"""
+        if guild_id is None:
+            return DEFAULT_CONFIG
+        return self.configs.get(guild_id, DEFAULT_CONFIG)
+
+    def prefix_for(self, guild_id: Optional[int]) -> str:
+        return self.get(guild_id).prefix
+
+    async def update(self, guild_id: int, **changes):
+        """Persist changed fields and swap in the new config"""
+        config = self.get(guild_id)._replace(**changes)
+        stored = dict(changes)
+        if "tracked_games" in stored:
+            stored["tracked_games"] = sorted(stored["tracked_games"])
+        collection = self.collection
+        if collection is not None:
+            await collection.update_one(
+                {"guild_id": str(guild_id)},
+                {"$set": {"guild_id": str(guild_id), **stored}},
+                upsert=True
+            )
+        self.configs[guild_id] = config
+        logger.info(f"Updated settings for guild {guild_id}: {', '.join(changes)}")
+
+        # The live "who's playing" index only covers tracked games
+        presence_changes = self.bot.get_cog('PresenceChanges')
+        guild = self.bot.get_guild(guild_id)
+        if "tracked_games" in changes and presence_changes and guild:
+            await presence_changes.rebuild_guild_index(guild)
+        return config
+
+    async def _apply(self, ctx, description: str, **changes):
+        try:
+            await self.update(ctx.guild.id, **changes)
+        except Exception as e:
+            logger.error(f"Error saving settings for guild {ctx.guild.id}: {e}")
+            await ctx.send("❌ Could not save the setting, please try again later.")
+            return
+        embed = discord.Embed(title="⚙️ Settings Updated", description=description, color=discord.Color.green())
+        await ctx.send(embed=embed)
+
+    @commands.command(name='settings')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def settings_command(self, ctx):
+        """Show this server's bot settings"""
+        config = self.get(ctx.guild.id)
+        embed = discord.Embed(title=f"⚙️ Settings for {ctx.guild.name}", color=discord.Color.blue())
+        embed.add_field(name="Prefix", value=f"`{config.prefix}`", inline=True)
+        embed.add_field(name="Cooldown", value=f"{config.cooldown} seconds", inline=True)
+        embed.add_field(name="Digest Window", value=f"{config.digest_window} seconds" if config.digest_window else "Off", inline=True)
+        embed.add_field(name="Tracked Games", value=", ".join(sorted(config.tracked_games)), inline=False)
+        embed.add_field(name="Notification Title", value=config.notification_title, inline=False)
+        embed.add_field(name="Notification Message", value=config.notification_message, inline=False)
+        embed.set_footer(text="Placeholders: {player}, {game}, {server}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='set_prefix')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def set_prefix_command(self, ctx, prefix: str):
+        """Change the command prefix for this server"""
+        if len(prefix) > MAX_PREFIX_LENGTH:
+            await ctx.send(f"❌ The prefix can be at most {MAX_PREFIX_LENGTH} characters.")
+            return
+        await self._apply(ctx, f"Command prefix is now `{prefix}`", prefix=prefix)
+
+    @commands.command(name='set_cooldown')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def set_cooldown_command(self, ctx, seconds: int):
+        """Change the per-member notification cooldown for this server"""
+        if seconds < 0:
+            await ctx.send("❌ The cooldown can't be negative.")
+            return
+        await self._apply(ctx, f"Notification cooldown is now {seconds} seconds", cooldown=seconds)
+
+    @commands.command(name='set_digest')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def set_digest_command(self, ctx, seconds: int):
+        """
+        Group notifications sent within <seconds> of each other into one message (0 to turn off)
+        Usage: !set_digest <seconds>
+        """
+        if not 0 <= seconds <= MAX_DIGEST_WINDOW:
+            await ctx.send(f"❌ The digest window must be between 0 and {MAX_DIGEST_WINDOW} seconds.")
+            return
+        description = f"Notifications within {seconds} seconds are now sent as one digest" if seconds else "Digest mode turned off"
+        await self._apply(ctx, description, digest_window=seconds)
+
+    @commands.command(name='track_game')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def track_game_command(self, ctx, *, game: str):
+        """Send notifications when members start playing <game>"""
+        games = self.get(ctx.guild.id).tracked_games | {game.strip().lower()}
+        await self._apply(ctx, f"Now tracking **{game}**", tracked_games=frozenset(games))
+
+    @commands.command(name='untrack_game')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def untrack_game_command(self, ctx, *, game: str):
+        """Stop sending notifications for <game>"""
+        current = self.get(ctx.guild.id).tracked_games
+        key = game.strip().lower()
+        if key not in current:
+            await ctx.send(f"❌ **{game}** is not tracked in this server.")
+            return
+        if len(current) == 1:
+            await ctx.send("❌ At least one game has to stay tracked. Use `!unsubscribe` to stop notifications.")
+            return
+        await self._apply(ctx, f"No longer tracking **{game}**", tracked_games=current - {key})
+
+    @commands.command(name='set_notification')
+    @commands.has_permissions(manage_guild=True)
+    @commands.guild_only()
+    async def set_notification_command(self, ctx, title: str, *, message: str):
+        """
+        Change the notification text for this server
+        Usage: !set_notification "<title>" <message>  (placeholders: {player}, {game}, {server})
+        """
+        await self._apply(ctx, "Notification text updated", notification_title=title, notification_message=message)
+
+
+# Setup function to add the cog to the bot
+async def setup(bot):
+    await bot.add_cog(GuildSettings(bot))
@@ -0,0 +1,359 @@
+import asyncio
+import discord
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from discord.ext import commands
+from typing import Dict, List, Optional, Set, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+from utils.cog_state import take_state
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '30'))  # seconds
+FLUSH_BATCH_SIZE = 500  # flush early once this many events are buffered
+MAX_BUFFERED_EVENTS = 50_000  # oldest events are dropped beyond this while the database is down
+LEADERBOARD_SIZE = 10
+METRICS = ("hours", "sessions", "streak")
+
+
+class PlayerStats:
+    """Running totals for one member in one guild"""
+    __slots__ = ("seconds", "sessions", "streak", "best_streak", "last_day")
+
+    def __init__(self, seconds: float = 0.0, sessions: int = 0, streak: int = 0,
+                 best_streak: int = 0, last_day: int = 0):
+        self.seconds = seconds
+        self.sessions = sessions
+        self.streak = streak
+        self.best_streak = best_streak
+        self.last_day = last_day  # UTC day number of the last session start
+
+    def active_streak(self, today: int) -> int:
+        """Consecutive days played, or 0 if the streak was broken before yesterday"""
+        return self.streak if self.last_day >= today - 1 else 0
+
+    def to_document(self) -> Dict:
+        return {"seconds": round(self.seconds, 1), "sessions": self.sessions, "streak": self.streak,
+                "best_streak": self.best_streak, "last_day": self.last_day}
+
+
+def _today() -> int:
+    """UTC day number"""
+    return int(time.time() // 86400)
+
+
+class PlaySessions(commands.Cog):
+    """Tracks play sessions of tracked games, with batched event storage and in-memory leaderboards"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # Open sessions: {(guild_id, member_id): (game, started_at)}
+        self.open_sessions: Dict[Tuple[int, int], Tuple[str, float]] = {}
+        # Aggregates: {guild_id: {member_id: PlayerStats}}, updated as sessions start and stop
+        self.stats: Dict[int, Dict[int, PlayerStats]] = {}
+        self._dirty: Set[Tuple[int, int]] = set()
+        # Leaderboards computed on first request and dropped when the guild's stats change or the day rolls over
+        self._leaderboards: Dict[Tuple[int, str], List[Tuple[int, PlayerStats]]] = {}
+        self._leaderboards_day = _today()
+
+        # Raw start/stop events waiting for the next insert_many
+        self.pending_events: List[Dict] = []
+        self.dropped_events = 0
+        self.last_flush: Optional[float] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._restored = False
+        # Set when open sessions come from a shutdown snapshot: when it was taken, so sessions
+        # that ended while the bot was down can be closed there once READY shows who still plays
+        self._verify_sessions_since: Optional[float] = None
+
+        state = take_state(bot, self)
+        if state:
+            self.import_state(state)
+
+    def export_state(self) -> Dict:
+        """Open sessions and totals, so sessions in progress survive a reload"""
+        return {
+            "open_sessions": [[guild_id, member_id, game, started_at]
+                              for (guild_id, member_id), (game, started_at) in self.open_sessions.items()],
+            "stats": [[guild_id, member_id, player.to_document()]
+                      for guild_id, players in self.stats.items() for member_id, player in players.items()],
+            "dirty": [list(key) for key in self._dirty],
+            "dropped_events": self.dropped_events,
+            "exported_at": time.time(),
+        }
+
+    def import_state(self, state: Dict):
+        self.open_sessions = {(guild_id, member_id): (game, started_at)
+                              for guild_id, member_id, game, started_at in state.get("open_sessions", [])}
+        for guild_id, member_id, doc in state.get("stats", []):
+            self.stats.setdefault(guild_id, {})[member_id] = PlayerStats(**doc)
+        self._dirty = {tuple(key) for key in state.get("dirty", [])}
+        self.dropped_events = state.get("dropped_events", 0)
+        self._restored = bool(self.stats)
+        if not self.bot.is_ready():
+            # Restored at boot rather than handed over by a reload: presences may have changed meanwhile
+            self._verify_sessions_since = state.get("exported_at", time.time())
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if self._verify_sessions_since is not None:
+            ended_at, self._verify_sessions_since = self._verify_sessions_since, None
+            self.verify_open_sessions(ended_at)
+
+    def verify_open_sessions(self, ended_at: float):
+        """Close restored sessions whose member no longer plays the game, as of ``ended_at``"""
+        closed = 0
+        for (guild_id, member_id), (game, _) in list(self.open_sessions.items()):
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(member_id) if guild else None
+            activity = member.activity if member else None
+            if activity and activity.name and activity.name.lower() == game.lower():
+                continue
+            self._close_session((guild_id, member_id), ended_at)
+            closed += 1
+        if closed:
+            logger.info(f"Closed {closed} play session(s) that ended while the bot was offline")
+
+    @property
+    def database(self):
+        """The SubscriptionManager's database"""
+        subscription_manager = self.bot.get_cog('SubscriptionManager')
+        if subscription_manager is None:
+            return None
+        return subscription_manager.database
+
+    async def cog_load(self):
+        # Handed-over totals are at least as fresh as the database, so skip the full read
+        await self.load_stats(totals=not self._restored)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def cog_unload(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+
+    async def load_stats(self, totals: bool = True):
+        """Load every player's totals in a single query and make sure the event collection exists"""
+        database = self.database
+        if database is None:
+            return
+        try:
+            await database.create_collection(
+                "play_session_events", timeseries={"timeField": "ts", "metaField": "meta", "granularity": "minutes"}
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        except Exception as e:
+            logger.debug(f"Could not create play_session_events as a time-series collection: {e}")
+
+        if not totals:
+            return
+        try:
+            stats: Dict[int, Dict[int, PlayerStats]] = {}
+            async for doc in database.play_session_stats.find({}, {"_id": 0}):
+                stats.setdefault(int(doc["guild_id"]), {})[int(doc["user_id"])] = PlayerStats(
+                    doc.get("seconds", 0.0), doc.get("sessions", 0), doc.get("streak", 0),
+                    doc.get("best_streak", 0), doc.get("last_day", 0)
+                )
+            self.stats = stats
+            self._leaderboards.clear()
+            logger.info(f"Loaded play stats for {sum(len(players) for players in stats.values())} player(s)")
+        except Exception as e:
+            logger.error(f"Error loading play stats: {e}")
+
+    def _player(self, guild_id: int, member_id: int) -> PlayerStats:
+        players = self.stats.setdefault(guild_id, {})
+        player = players.get(member_id)
+        if player is None:
+            player = players[member_id] = PlayerStats()
+        return player
+
+    def _touch(self, guild_id: int, member_id: int):
+        self._dirty.add((guild_id, member_id))
+        for key in [key for key in self._leaderboards if key[0] == guild_id]:
+            del self._leaderboards[key]
+
+    def _buffer(self, event_type: str, guild_id: int, member_id: int, game: str, duration: Optional[float] = None):
+        event = {
+            "ts": datetime.now(timezone.utc),
+            "meta": {"guild_id": str(guild_id), "user_id": member_id, "game": game},
+            "type": event_type,
+        }
+        if duration is not None:
+            event["duration"] = round(duration, 1)
+        self.pending_events.append(event)
+        if len(self.pending_events) > MAX_BUFFERED_EVENTS:
+            overflow = len(self.pending_events) - MAX_BUFFERED_EVENTS
+            del self.pending_events[:overflow]
+            self.dropped_events += overflow
+        # A failed flush puts its events back, so the buffer can already be past the batch size
+        if len(self.pending_events) >= FLUSH_BATCH_SIZE and not self._flush_lock.locked() \
+                and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.flush())
+
+    def session_started(self, member, game: str):
+        """A member of ``member.guild`` started playing a tracked game"""
+        key = (member.guild.id, member.id)
+        if key in self.open_sessions:
+            self.session_stopped(member, self.open_sessions[key][0])
+
+        self.open_sessions[key] = (game, time.time())
+        self._buffer("start", member.guild.id, member.id, game)
+
+        player = self._player(*key)
+        today = _today()
+        if player.last_day != today:
+            player.streak = player.streak + 1 if player.last_day == today - 1 else 1
+            player.best_streak = max(player.best_streak, player.streak)
+            player.last_day = today
+            self._touch(*key)
+
+    def session_stopped(self, member, game: str):
+        """A member stopped playing; closes the open session, if any"""
+        self._close_session((member.guild.id, member.id), time.time())
+
+    def _close_session(self, key: Tuple[int, int], ended_at: float):
+        session = self.open_sessions.pop(key, None)
+        if session is None:
+            return
+        duration = max(0.0, ended_at - session[1])
+        self._buffer("stop", key[0], key[1], session[0], duration)
+
+        player = self._player(*key)
+        player.seconds += duration
+        player.sessions += 1
+        self._touch(*key)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered events with one insert_many and changed totals with one bulk_write"""
+        subscription_manager = self.bot.get_cog('SubscriptionManager')
+        if subscription_manager is None:
+            return
+        database, breaker = subscription_manager.database, subscription_manager.mongo_breaker
+        async with self._flush_lock:
+            # Keep buffering while the breaker is open rather than failing a write per flush
+            if not breaker.allow():
+                return
+            events, self.pending_events = self.pending_events, []
+            dirty, self._dirty = self._dirty, set()
+            # Until insert_many says otherwise, none of the events are written
+            failed: List[Dict] = events
+            try:
+                if events:
+                    try:
+                        await breaker.call(database.play_session_events.insert_many, events, ordered=False)
+                        failed = []
+                    except BulkWriteError as e:
+                        # Unordered, so everything but the reported errors was written; duplicates already were
+                        errors = e.details.get("writeErrors", [])
+                        failed = [events[error["index"]] for error in errors if error.get("code") != 11000]
+                        logger.error(f"{len(errors)} of {len(events)} play session event(s) were not written")
+                if dirty:
+                    await breaker.call(database.play_session_stats.bulk_write, [
+                        UpdateOne({"guild_id": str(guild_id), "user_id": member_id},
+                                  {"$set": self._player(guild_id, member_id).to_document()}, upsert=True)
+                        for guild_id, member_id in dirty
+                    ], ordered=False)
+                self.last_flush = time.time()
+            except Exception as e:
+                logger.error(f"Error writing play session data ({len(failed)} event(s) kept for the next flush): {e}")
+                self._dirty |= dirty
+            if failed:
+                # Keep them for the next flush
+                self.pending_events[:0] = failed
+                if len(self.pending_events) > MAX_BUFFERED_EVENTS:
+                    overflow = len(self.pending_events) - MAX_BUFFERED_EVENTS
+                    del self.pending_events[:overflow]
+                    self.dropped_events += overflow
+
+    def leaderboard(self, guild_id: int, metric: str = "hours",
+                    limit: int = LEADERBOARD_SIZE) -> List[Tuple[int, PlayerStats]]:
+        """Top players of a guild by hours, sessions or current streak"""
+        today = _today()
+        if today != self._leaderboards_day:
+            # Streaks depend on the day, and yesterday's boards would otherwise never be evicted
+            self._leaderboards.clear()
+            self._leaderboards_day = today
+        key = (guild_id, metric)
+        board = self._leaderboards.get(key)
+        if board is None:
+            players = self.stats.get(guild_id, {})
+            if metric == "sessions":
+                sort_key = lambda item: item[1].sessions
+            elif metric == "streak":
+                sort_key = lambda item: item[1].active_streak(today)
+            else:
+                sort_key = lambda item: item[1].seconds
+            board = [item for item in heapq.nlargest(LEADERBOARD_SIZE, players.items(), key=sort_key)
+                     if sort_key(item) > 0]
+            self._leaderboards[key] = board
+        return board[:limit]
+
+    def guild_summary(self, guild_id: int) -> Dict:
+        """Totals and top players of a guild for the web interface"""
+        players = list(self.stats.get(guild_id, {}).items())
+        today = _today()
+        return {
+            "guild_id": str(guild_id),
+            "players": len(players),
+            "hours": round(sum(stats.seconds for _, stats in players) / 3600, 1),
+            "sessions": sum(stats.sessions for _, stats in players),
+            "sailing_now": sum(1 for key in list(self.open_sessions) if key[0] == guild_id),
+            "top": [
+                {"user_id": str(member_id), "hours": round(stats.seconds / 3600, 1), "sessions": stats.sessions,
+                 "streak": stats.active_streak(today), "best_streak": stats.best_streak}
+                for member_id, stats in self.leaderboard(guild_id)
+            ],
+        }
+
+    @commands.command(name='leaderboard')
+    @commands.guild_only()
+    async def leaderboard_command(self, ctx, metric: str = "hours"):
+        """
+        Show who sails most in this server
+        Usage: !leaderboard [hours|sessions|streak]
+        """
+        metric = metric.lower()
+        if metric not in METRICS:
+            await ctx.send(f"❌ Choose one of: {', '.join(METRICS)}")
+            return
+
+        board = self.leaderboard(ctx.guild.id, metric)
+        embed = discord.Embed(title=f"🏆 Leaderboard - {metric.capitalize()}", color=discord.Color.gold())
+        if not board:
+            embed.description = "Nobody has finished a session yet. Set sail!"
+            await ctx.send(embed=embed)
+            return
+
+        today = _today()
+        lines = []
+        for rank, (member_id, stats) in enumerate(board, start=1):
+            member = ctx.guild.get_member(member_id)
+            name = member.display_name if member else f"<@{member_id}>"
+            if metric == "sessions":
+                value = f"{stats.sessions} session(s)"
+            elif metric == "streak":
+                value = f"{stats.active_streak(today)} day(s)"
+            else:
+                value = f"{stats.seconds / 3600:.1f} h"
+            lines.append(f"**{rank}.** {name} - {value}")
+        embed.description = "\n".join(lines)
+        embed.set_footer(text="Counts completed sessions of tracked games")
+        await ctx.send(embed=embed)
+
+
+# Setup function to add the cog to the bot
+async def setup(bot):
+    await bot.add_cog(PlaySessions(bot))
@@ -1,56 +1,169 @@
+import asyncio
 import discord
+import logging
 from discord.ext import commands
 import os
-from typing import Optional
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from cogs.guild_settings import DEFAULT_TRACKED_GAMES
+from utils.cog_state import take_state
 
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() in ['true', '1', 'yes']
 
+logger = logging.getLogger(__name__)
+
 class PresenceChanges(commands.Cog):
     """Handles presence change events for members"""
     
     def __init__(self, bot):
         self.bot = bot
-
-    def check_if_sea_of_thieves(activity_name: Optional[str] = None):
-        """Check if the activity is Sea of Thieves"""
+        # Live index of who is playing what: {(guild_id, lowercased game): {member_id}}
+        # Only tracked games are indexed; kept up to date from presence transitions
+        self.playing: Dict[Tuple[int, str], Set[int]] = {}
+        # Indexes being rebuilt: {guild_id: {lowercased game: {member_id}}}, so transitions
+        # that arrive while a rebuild yields are applied to the index that replaces the old one
+        self._building: Dict[int, Dict[str, Set[int]]] = {}
+
+        # After a reload the index is handed over, since on_ready won't fire again to rebuild it
+        state = take_state(bot, self)
+        if state:
+            self.playing = {(guild_id, game): set(members) for guild_id, game, members in state.get("playing", [])}
+
+    def export_state(self) -> Dict:
+        return {"playing": [[guild_id, game, list(members)] for (guild_id, game), members in self.playing.items()]}
+
+    def tracked_games_for(self, guild) -> FrozenSet[str]:
+        """Lowercased names of the games a guild gets notifications for"""
+        guild_settings = self.bot.get_cog('GuildSettings')
+        if guild_settings is None:
+            return DEFAULT_TRACKED_GAMES
+        return guild_settings.get(guild.id if guild else None).tracked_games
+
+    def is_tracked_game(self, guild, activity_name: Optional[str] = None) -> bool:
+        """Check if the activity is one of the guild's tracked games"""
         if not activity_name:
             return False
-            
-        right_game = "sea of thieves"
 
         # Debugging output
         if DEBUG_MODE:
-            print(f"[DEBUG] Checking if activity '{activity_name}' is Sea of Thieves")
+            logger.debug(f"Checking if activity '{activity_name}' is tracked", extra={'sample': 'presence'})
+
+        return activity_name.lower() in self.tracked_games_for(guild)
+
+    def _index_transition(self, guild, member_id: int, before_activity: Optional[str], after_activity: Optional[str]):
+        if self.is_tracked_game(guild, before_activity):
+            key = (guild.id, before_activity.lower())
+            members = self.playing.get(key)
+            if members is not None:
+                members.discard(member_id)
+                if not members:
+                    del self.playing[key]
+        if self.is_tracked_game(guild, after_activity):
+            self.playing.setdefault((guild.id, after_activity.lower()), set()).add(member_id)
+
+        building = self._building.get(guild.id)
+        if building is not None:
+            if self.is_tracked_game(guild, before_activity):
+                building.get(before_activity.lower(), set()).discard(member_id)
+            if self.is_tracked_game(guild, after_activity):
+                building.setdefault(after_activity.lower(), set()).add(member_id)
+
+    async def rebuild_guild_index(self, guild):
+        """Walk a guild's member cache once and re-index who is playing its tracked games"""
+        tracked = self.tracked_games_for(guild)
+        index: Dict[str, Set[int]] = {}
+        self._building[guild.id] = index
+        try:
+            for i, member in enumerate(list(guild.members), start=1):
+                activity = member.activity
+                if activity and activity.name and activity.name.lower() in tracked:
+                    index.setdefault(activity.name.lower(), set()).add(member.id)
+                if i % 5000 == 0:
+                    await asyncio.sleep(0)  # don't hold the loop on very large guilds
+        finally:
+            if self._building.get(guild.id) is index:
+                del self._building[guild.id]
+        self.drop_guild_index(guild.id)
+        for game, members in index.items():
+            if members:
+                self.playing[(guild.id, game)] = members
+
+    def drop_guild_index(self, guild_id: int):
+        for key in [key for key in self.playing if key[0] == guild_id]:
+            del self.playing[key]
+
+    def sailing_now(self, guild) -> Dict[str, Set[int]]:
+        """{game: member ids} for the guild's tracked games, without touching the member list"""
+        found = {}
+        for game in self.tracked_games_for(guild):
+            members = self.playing.get((guild.id, game))
+            if members:
+                found[game] = members
+        return found
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready fires after the member chunks have arrived, so presences are complete here
+        for guild in list(self.bot.guilds):
+            await self.rebuild_guild_index(guild)
+        logger.info(f"Indexed {sum(len(members) for members in self.playing.values())} member(s) playing tracked games")
+
+    # discord.py also dispatches these for every guild while it prepares READY;
+    # on_ready indexes all guilds once, so only later joins and outages matter here
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        if self.bot.is_ready():
+            await self.rebuild_guild_index(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        if self.bot.is_ready():
+            await self.rebuild_guild_index(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.drop_guild_index(guild.id)
 
-        if activity_name.lower() == right_game:
-            return True
-        return False
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        activity = member.activity.name if member.activity else None
+        self._index_transition(member.guild, member.id, activity, None)
 
-    async def check_sea_of_thieves_activity(self, before, after):
-        """Check for Sea of Thieves activity changes and notify subscribers"""
+    async def check_tracked_game_activity(self, before, after):
+        """Check for tracked game activity changes, record play sessions and notify subscribers"""
         before_activity = before.activity.name if before.activity else None
         after_activity = after.activity.name if after.activity else None
 
-        # Only check if Sea of Thieves started (removed stop notifications)
-        if (not self.check_if_sea_of_thieves(before_activity) and
-                self.check_if_sea_of_thieves(after_activity)):
+        if (before_activity or "").lower() == (after_activity or "").lower():
+            return
+
+        self._index_transition(after.guild, after.id, before_activity, after_activity)
+
+        play_sessions = self.bot.get_cog('PlaySessions')
+        if play_sessions and self.is_tracked_game(before.guild, before_activity):
+            play_sessions.session_stopped(after, before_activity)
+
+        # Only notify when a tracked game started (no stop notifications)
+        if self.is_tracked_game(after.guild, after_activity):
+            if play_sessions:
+                play_sessions.session_started(after, after_activity)
 
             # Get subscription manager and notify
             subscription_manager = self.bot.get_cog('SubscriptionManager')
             if subscription_manager:
-                await subscription_manager.notify_sea_of_thieves_activity(after, "start")
+                await subscription_manager.notify_sea_of_thieves_activity(after, "start", game=after_activity)
 
     async def on_tracked_game_activity(self, member, activity_name: str, activity_type: str):
         """Check if the activity is a tracked game"""
-        if self.check_if_sea_of_thieves(activity_name):
-            print(f"🏴‍☠️ {member.name} {activity_type}ed Sea of Thieves!")
+        if self.is_tracked_game(member.guild, activity_name):
+            logger.debug(f"🏴‍☠️ {member.name} {activity_type}ed {activity_name}!")
 
 
     @commands.Cog.listener()
     async def on_presence_update(self, before, after):
         """Event triggered when a member's presence changes"""
-        # Always check for Sea of Thieves activity for notifications
-        await self.check_sea_of_thieves_activity(before, after)
+        # Always check for tracked game activity for notifications
+        await self.check_tracked_game_activity(before, after)
         
         if not DEBUG_MODE:
             return
@@ -62,15 +175,15 @@ class PresenceChanges(commands.Cog):
         if before_activity != after_activity:
             if after_activity:
                 if before_activity:
-                    print(f"🎮 {after.name} switched from '{before_activity}' to '{after_activity}'")
+                    logger.debug(f"🎮 {after.name} switched from '{before_activity}' to '{after_activity}'", extra={'sample': 'presence'})
                 else:
-                    print(f"🎮 {after.name} started playing: {after_activity}")
+                    logger.debug(f"🎮 {after.name} started playing: {after_activity}", extra={'sample': 'presence'})
                 
                 # Check if the activity is a tracked game
                 await self.on_tracked_game_activity(after, after_activity, "start")
             else:
                 if before_activity:
-                    print(f"🎮 {after.name} stopped playing: {before_activity}")
+                    logger.debug(f"🎮 {after.name} stopped playing: {before_activity}", extra={'sample': 'presence'})
                     # Removed stop activity tracking since we don't notify for stops
 
 
@@ -85,6 +198,28 @@ class PresenceChanges(commands.Cog):
 
     
 
+    @commands.command(name='sailing')
+    @commands.guild_only()
+    async def sailing_command(self, ctx):
+        """Show who in this server is playing a tracked game right now"""
+        sailing = self.sailing_now(ctx.guild)
+        embed = discord.Embed(title="🚢 Sailing Now", color=discord.Color.blue())
+        if not sailing:
+            embed.description = "Nobody is sailing right now."
+            await ctx.send(embed=embed)
+            return
+
+        for game, member_ids in sorted(sailing.items()):
+            names = []
+            for member_id in list(member_ids)[:25]:
+                member = ctx.guild.get_member(member_id)
+                names.append(member.display_name if member else f"<@{member_id}>")
+            if len(member_ids) > len(names):
+                names.append(f"and {len(member_ids) - len(names)} more")
+            embed.add_field(name=f"{game.title()} ({len(member_ids)})", value=", ".join(names)[:1024], inline=False)
+        await ctx.send(embed=embed)
+
+
 # Setup function to add the cog to the bot
 async def setup(bot):
     await bot.add_cog(PresenceChanges(bot))
\ No newline at end of file
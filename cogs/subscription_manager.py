@@ -1,11 +1,49 @@
 import discord
+import logging
 from discord.ext import commands
+import asyncio
 import json
 import os
 import time
-from typing import Dict, Optional
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+from cogs.guild_settings import DEFAULT_CONFIG, GuildConfig, render_template
+from utils.cog_state import take_state
+from utils.local_store import LocalSubscriptionStore
+from utils.mongo_health import (
+    CLOSED, CircuitBreaker, CircuitOpen, MongoHealthMonitor, mongo_client_options, mongo_database_name,
+)
+from utils.webhook_delivery import WebhookDelivery, WebhookGone
+
+logger = logging.getLogger(__name__)
+
+# Longest cog_unload spends sending pending digests when no shutdown drain ran first (e.g. !reload)
+UNLOAD_DIGEST_TIMEOUT = 5.0
+
+
+def summarize_names(names: List[str], shown: int = 2) -> str:
+    """'**Alice**', '**Alice** and **Bob**', '**Alice**, **Bob** and 3 others'"""
+    bold = [f"**{name}**" for name in names]
+    if len(bold) <= 1:
+        return "".join(bold)
+    if len(bold) <= shown + 1:
+        return ", ".join(bold[:-1]) + f" and {bold[-1]}"
+    return ", ".join(bold[:shown]) + f" and {len(bold) - shown} others"
+
+
+class PendingDigest:
+    """Notifications collected for one channel or DM recipient during a digest window"""
+    __slots__ = ("config", "entries", "task")
+
+    def __init__(self, config: GuildConfig):
+        self.config = config
+        self.entries: List[Tuple] = []  # (member, guild, game)
+        self.task: Optional[asyncio.Task] = None
+
 
 class SubscriptionManager(commands.Cog):
     """Manages server subscriptions for Sea of Thieves notifications"""
@@ -16,111 +54,354 @@ class SubscriptionManager(commands.Cog):
         self.bot = bot
         # MongoDB connection
         self.mongo_url = os.getenv('MONGODB_URL', 'mongodb://localhost:27017')
-        self.client: AsyncIOMotorClient = AsyncIOMotorClient(self.mongo_url)
-
-        # Dev Mode uses grebbot_db_test, production uses grebbot_db
-        if os.getenv('DEBUG_MODE', 'False').lower() in ['true', '1', 'yes']:
-            self.database: AsyncIOMotorDatabase = self.client.grebbot_db_test
-            print("Using test database: grebbot_db_test")
-        else:
-            self.database: AsyncIOMotorDatabase = self.client.grebbot_db
-
+        # Short timeouts so an unreachable server fails fast instead of stalling presence handling
+        self.client: AsyncIOMotorClient = AsyncIOMotorClient(self.mongo_url, **mongo_client_options())
 
-        self.database: AsyncIOMotorDatabase = self.client.grebbot_db_test
+        # Dev Mode uses grebbot_db_test, production uses grebbot_db (MONGODB_DATABASE overrides both)
+        debug = os.getenv('DEBUG_MODE', 'False').lower() in ['true', '1', 'yes']
+        self.database: AsyncIOMotorDatabase = self.client[mongo_database_name(debug)]
+        if self.database.name != 'grebbot_db':
+            logger.warning(f"Using database: {self.database.name}")
         self.subscriptions_collection: AsyncIOMotorCollection = self.database.sea_of_thieves_subscriptions
         self.dm_subscriptions_collection: AsyncIOMotorCollection = self.database.dm_subscriptions
+
+        # While Mongo is down the breaker short-circuits DB calls and reads are served from
+        # the last known data: {guild_id: subscription} and {guild_id: {enabled DM subscriber ids}}
+        self.mongo_breaker = CircuitBreaker(
+            "MongoDB",
+            failure_threshold=int(os.getenv('MONGODB_BREAKER_THRESHOLD', '3')),
+            reset_timeout=float(os.getenv('MONGODB_BREAKER_RESET', '30'))
+        )
+        self.mongo_health = MongoHealthMonitor(self.client, self.mongo_breaker,
+                                               interval=float(os.getenv('MONGODB_HEALTH_INTERVAL', '15')))
+        self.subscriptions_cache: Dict[str, Dict] = {}
+        self.dm_subscribers_cache: Dict[str, Set[int]] = {}
+
+        # Local mirror of both collections (opened in cog_load): warms the caches at startup,
+        # keeps writes made while Mongo is down and syncs them back when it returns
+        self.local_store_path = os.getenv('LOCAL_STORE_PATH', 'data/grebbot_local.sqlite3')
+        self.local_store: Optional[LocalSubscriptionStore] = None
+        self.last_reconcile: Optional[float] = None
+        self._reconcile_task: Optional[asyncio.Task] = None
         
         # Cooldown tracking: {member_id: {guild_id: last_notification_time}}
         self.notification_cooldowns: Dict[int, Dict[str, float]] = {}
-        self.cooldown_duration = 120  # 2 minutes in seconds
+        self.cooldown_duration = DEFAULT_CONFIG.cooldown  # default when GuildSettings isn't loaded
+
+        # Digest mode: pending aggregated notifications keyed by channel id / DM recipient id
+        self.channel_digests: Dict[int, PendingDigest] = {}
+        self.dm_digests: Dict[int, PendingDigest] = {}
+
+        # Delivery counters: notifications triggered per guild, API calls per channel / DM recipient
+        self.notification_events: Counter = Counter()
+        self.channel_api_calls: Counter = Counter()
+        self.dm_api_calls: Counter = Counter()
+
+        # Webhook delivery: {channel_id: (webhook_id, webhook_token)} for subscriptions created with `webhook`
+        self.webhook_delivery = WebhookDelivery()
+        self.channel_webhooks: Dict[int, Tuple[int, str]] = {}
+
+        # Notifications being sent right now, so shutdown can let them finish
+        self._inflight: Set[asyncio.Task] = set()
+        self._drained = False
+
+        state = take_state(bot, self)
+        if state:
+            self.import_state(state)
+
+    def export_state(self) -> Dict:
+        """Cooldowns, last known DM subscribers and delivery counters, for the next instance of this cog"""
+        return {
+            "notification_cooldowns": {str(member_id): dict(guilds)
+                                       for member_id, guilds in self.notification_cooldowns.items()},
+            "dm_subscribers": {guild_id: sorted(user_ids) for guild_id, user_ids in self.dm_subscribers_cache.items()},
+            "notification_events": dict(self.notification_events),
+            "channel_api_calls": {str(channel_id): n for channel_id, n in self.channel_api_calls.items()},
+            "dm_api_calls": {str(user_id): n for user_id, n in self.dm_api_calls.items()},
+        }
+
+    def import_state(self, state: Dict):
+        self.notification_cooldowns = {
+            int(member_id): guilds for member_id, guilds in state.get("notification_cooldowns", {}).items()
+        }
+        self.dm_subscribers_cache = {guild_id: set(user_ids)
+                                     for guild_id, user_ids in state.get("dm_subscribers", {}).items()}
+        self.notification_events.update(state.get("notification_events", {}))
+        self.channel_api_calls.update({int(k): n for k, n in state.get("channel_api_calls", {}).items()})
+        self.dm_api_calls.update({int(k): n for k, n in state.get("dm_api_calls", {}).items()})
+        logger.info(f"Restored {len(self.notification_cooldowns)} member cooldown(s)")
+
+    async def cog_load(self):
+        if self.local_store_path:
+            try:
+                self.local_store = await asyncio.to_thread(LocalSubscriptionStore, self.local_store_path)
+                await self._warm_caches()
+            except Exception as e:
+                logger.error(f"Error opening local subscription store {self.local_store_path}: {e}")
+                self.local_store = None
+        self.mongo_breaker.listeners.append(self._on_breaker_change)
+        self._schedule_reconcile()
+        self.mongo_health.start()
+
+    async def cog_unload(self):
+        self.mongo_health.stop()
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+        if self._on_breaker_change in self.mongo_breaker.listeners:
+            self.mongo_breaker.listeners.remove(self._on_breaker_change)
+        # Send pending digests now rather than from a task holding the unloaded instance. After a
+        # shutdown drain() has already had its budget, so whatever it couldn't send is dropped
+        await self.flush_digests_within(0.0 if self._drained else UNLOAD_DIGEST_TIMEOUT)
+        if self.local_store:
+            self.local_store.close()
+            self.local_store = None
+        await self.webhook_delivery.close()
+        # Each instance opens its own client; left open, every reload would leak its pool and monitor threads
+        self.client.close()
+
+    async def _warm_caches(self):
+        """Fill the in-memory subscription caches from the local store"""
+        store = self.local_store
+        if store is None:
+            return
+        subscriptions = await asyncio.to_thread(store.enabled_subscriptions)
+        dm_pairs = await asyncio.to_thread(store.enabled_dm_subscriptions)
+        dm_subscribers: Dict[str, Set[int]] = {}
+        for user_id, guild_id in dm_pairs:
+            dm_subscribers.setdefault(guild_id, set()).add(user_id)
+        self.subscriptions_cache = subscriptions
+        self.dm_subscribers_cache = dm_subscribers
+        logger.info(f"Loaded {len(subscriptions)} subscription(s) and {len(dm_pairs)} DM subscription(s) from the local store")
+
+    def _on_breaker_change(self, previous: str, state: str):
+        if state == CLOSED:
+            self._schedule_reconcile()
+
+    def _schedule_reconcile(self):
+        if self.local_store is None:
+            return
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_until_synced())
+
+    async def _reconcile_until_synced(self):
+        while not await self.reconcile():
+            await asyncio.sleep(self.mongo_health.interval)
+
+    async def reconcile(self) -> bool:
+        """Push writes made while MongoDB was down, then refresh the local store and caches from MongoDB"""
+        store = self.local_store
+        if store is None:
+            return True
+        try:
+            dirty = await asyncio.to_thread(store.dirty_subscriptions)
+            for doc in dirty:
+                await self._db(self.subscriptions_collection.replace_one, {"guild_id": doc["guild_id"]}, doc, upsert=True)
+            if dirty:
+                await asyncio.to_thread(store.mark_subscriptions_clean, [doc["guild_id"] for doc in dirty])
+
+            dirty_dm = await asyncio.to_thread(store.dirty_dm_subscriptions)
+            if dirty_dm:
+                await self._db(self.dm_subscriptions_collection.bulk_write, [
+                    UpdateOne({"user_id": user_id, "guild_id": guild_id},
+                              {"$set": {"user_id": user_id, "guild_id": guild_id, "enabled": enabled}},
+                              upsert=True)
+                    for user_id, guild_id, enabled in dirty_dm
+                ], ordered=False)
+                await asyncio.to_thread(store.mark_dm_subscriptions_clean,
+                                        [(user_id, guild_id) for user_id, guild_id, _ in dirty_dm])
+
+            docs = await self._db(self._find, self.subscriptions_collection, {})
+            await asyncio.to_thread(store.replace_subscriptions, docs)
+            dm_count = await self._db(self._mirror_dm_subscriptions, store)
+            await self._warm_caches()
+            self.last_reconcile = time.time()
+            logger.info(f"Reconciled local store with MongoDB: pushed {len(dirty) + len(dirty_dm)} change(s), "
+                        f"pulled {len(docs)} subscription(s) and {dm_count} DM subscription(s)")
+            return True
+        except CircuitOpen:
+            logger.info("MongoDB unavailable, local store reconcile postponed")
+        except Exception as e:
+            logger.error(f"Error reconciling local store with MongoDB: {e}")
+        return False
+
+    async def _mirror_dm_subscriptions(self, store: LocalSubscriptionStore, batch_size: int = 1000) -> int:
+        """Stream every DM subscription into the local store in batches"""
+        count = 0
+        batch = []
+        async for sub in self.dm_subscriptions_collection.find({}, {"_id": 0, "user_id": 1, "guild_id": 1, "enabled": 1}):
+            batch.append((sub["user_id"], sub["guild_id"], sub.get("enabled", False)))
+            if len(batch) >= batch_size:
+                await asyncio.to_thread(store.save_dm_subscriptions, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(store.save_dm_subscriptions, batch)
+            count += len(batch)
+        return count
+
+    async def _fallback_subscription(self, guild_id: str) -> Optional[Dict]:
+        if self.local_store:
+            return await asyncio.to_thread(self.local_store.get_subscription, guild_id)
+        return self.subscriptions_cache.get(guild_id)
+
+    async def _db(self, func, *args, **kwargs):
+        """Run one DB operation through the circuit breaker"""
+        return await self.mongo_breaker.call(func, *args, **kwargs)
+
+    @staticmethod
+    async def _find(collection, query: Dict) -> List[Dict]:
+        return [doc async for doc in collection.find(query)]
+
+    def guild_config(self, guild_id: str) -> GuildConfig:
+        """Per-guild settings from the GuildSettings cog (defaults if it isn't loaded)"""
+        guild_settings = self.bot.get_cog('GuildSettings')
+        if guild_settings is None:
+            return DEFAULT_CONFIG._replace(cooldown=self.cooldown_duration)
+        return guild_settings.get(int(guild_id))
+
+    def cooldown_for(self, guild_id: str) -> int:
+        """Cooldown length in seconds for a guild"""
+        return self.guild_config(guild_id).cooldown
     
     async def get_subscription(self, guild_id: str) -> Optional[Dict]:
         """Get subscription for a specific guild"""
         try:
-            subscription = await self.subscriptions_collection.find_one({"guild_id": guild_id})
+            subscription = await self._db(self.subscriptions_collection.find_one, {"guild_id": guild_id})
             return subscription
+        except CircuitOpen:
+            return await self._fallback_subscription(guild_id)
         except Exception as e:
-            print(f"Error getting subscription for guild {guild_id}: {e}")
-            return None
+            logger.error(f"Error getting subscription for guild {guild_id}: {e}")
+            return await self._fallback_subscription(guild_id)
     
     async def save_subscription(self, guild_id: str, subscription_data: Dict):
         """Save or update subscription for a guild"""
+        if subscription_data.get("enabled", False):
+            self.subscriptions_cache[guild_id] = {**self.subscriptions_cache.get(guild_id, {}), **subscription_data}
+        else:
+            self.subscriptions_cache.pop(guild_id, None)
+        saved = False
         try:
-            await self.subscriptions_collection.update_one(
+            await self._db(
+                self.subscriptions_collection.update_one,
                 {"guild_id": guild_id},
                 {"$set": subscription_data},
                 upsert=True
             )
-            print(f"Saved subscription for guild {guild_id}")
+            saved = True
+            logger.info(f"Saved subscription for guild {guild_id}")
+        except CircuitOpen:
+            logger.warning(f"MongoDB unavailable, subscription for guild {guild_id} will be synced later")
         except Exception as e:
-            print(f"Error saving subscription for guild {guild_id}: {e}")
+            logger.error(f"Error saving subscription for guild {guild_id}: {e}")
+        if self.local_store:
+            await asyncio.to_thread(self.local_store.save_subscription, guild_id, subscription_data, dirty=not saved)
     
     async def get_all_subscriptions(self) -> Dict[str, Dict]:
-        """Get all active subscriptions"""
+        """Get all active subscriptions (the last known set while MongoDB is unavailable)"""
         try:
-            subscriptions = {}
-            async for sub in self.subscriptions_collection.find({"enabled": True}):
-                subscriptions[sub["guild_id"]] = sub
-            return subscriptions
+            docs = await self._db(self._find, self.subscriptions_collection, {"enabled": True})
+        except CircuitOpen:
+            return dict(self.subscriptions_cache)
         except Exception as e:
-            print(f"Error getting all subscriptions: {e}")
-            return {}
+            logger.error(f"Error getting all subscriptions: {e}")
+            return dict(self.subscriptions_cache)
+        subscriptions = {sub["guild_id"]: sub for sub in docs}
+        self.subscriptions_cache = subscriptions
+        return dict(subscriptions)
     
     async def get_dm_subscription(self, user_id: int, guild_id: str) -> Optional[Dict]:
         """Get DM subscription for a specific user in a specific guild"""
         try:
-            dm_sub = await self.dm_subscriptions_collection.find_one({
+            dm_sub = await self._db(self.dm_subscriptions_collection.find_one, {
                 "user_id": user_id,
                 "guild_id": guild_id
             })
             return dm_sub
+        except CircuitOpen:
+            return self._cached_dm_subscription(user_id, guild_id)
         except Exception as e:
-            print(f"Error getting DM subscription for user {user_id} in guild {guild_id}: {e}")
-            return None
+            logger.error(f"Error getting DM subscription for user {user_id} in guild {guild_id}: {e}")
+            return self._cached_dm_subscription(user_id, guild_id)
+
+    def _cached_dm_subscription(self, user_id: int, guild_id: str) -> Optional[Dict]:
+        if user_id in self.dm_subscribers_cache.get(guild_id, ()):
+            return {"user_id": user_id, "guild_id": guild_id, "enabled": True}
+        return None
     
     async def save_dm_subscription(self, user_id: int, guild_id: str, enabled: bool):
         """Save or update DM subscription for a user"""
+        if enabled:
+            self.dm_subscribers_cache.setdefault(guild_id, set()).add(user_id)
+        else:
+            self.dm_subscribers_cache.get(guild_id, set()).discard(user_id)
+        saved = False
         try:
             dm_data = {
                 "user_id": user_id,
                 "guild_id": guild_id,
                 "enabled": enabled
             }
-            await self.dm_subscriptions_collection.update_one(
+            await self._db(
+                self.dm_subscriptions_collection.update_one,
                 {"user_id": user_id, "guild_id": guild_id},
                 {"$set": dm_data},
                 upsert=True
             )
-            print(f"Saved DM subscription for user {user_id} in guild {guild_id}: {enabled}")
+            saved = True
+            logger.info(f"Saved DM subscription for user {user_id} in guild {guild_id}: {enabled}")
+        except CircuitOpen:
+            logger.warning(f"MongoDB unavailable, DM subscription for user {user_id} will be synced later")
         except Exception as e:
-            print(f"Error saving DM subscription: {e}")
+            logger.error(f"Error saving DM subscription: {e}")
+        if self.local_store:
+            await asyncio.to_thread(self.local_store.save_dm_subscription, user_id, guild_id, enabled, dirty=not saved)
     
     async def get_dm_subscribers_for_guild(self, guild_id: str) -> list:
         """Get all users subscribed to DMs for a specific guild"""
+        recipients = await self.get_dm_recipients_for_guilds([guild_id])
+        return list(recipients)
+    
+    async def get_dm_recipients_for_guilds(self, guild_ids: List[str]) -> Dict[int, List[str]]:
+        """Map each DM subscriber of any of the guilds to the guilds they're subscribed through (one query)"""
         try:
-            subscribers = []
-            async for sub in self.dm_subscriptions_collection.find({
-                "guild_id": guild_id,
+            docs = await self._db(self._find, self.dm_subscriptions_collection, {
+                "guild_id": {"$in": guild_ids},
                 "enabled": True
-            }):
-                subscribers.append(sub["user_id"])
-            return subscribers
+            })
+        except CircuitOpen:
+            return self._cached_dm_recipients(guild_ids)
         except Exception as e:
-            print(f"Error getting DM subscribers for guild {guild_id}: {e}")
-            return []
+            logger.error(f"Error getting DM subscribers for guilds {guild_ids}: {e}")
+            return self._cached_dm_recipients(guild_ids)
+
+        recipients: Dict[int, List[str]] = {}
+        subscribers: Dict[str, Set[int]] = {guild_id: set() for guild_id in guild_ids}
+        for sub in docs:
+            recipients.setdefault(sub["user_id"], []).append(sub["guild_id"])
+            subscribers[sub["guild_id"]].add(sub["user_id"])
+        self.dm_subscribers_cache.update(subscribers)
+        return recipients
+
+    def _cached_dm_recipients(self, guild_ids: List[str]) -> Dict[int, List[str]]:
+        recipients: Dict[int, List[str]] = {}
+        for guild_id in guild_ids:
+            for user_id in self.dm_subscribers_cache.get(guild_id, ()):
+                recipients.setdefault(user_id, []).append(guild_id)
+        return recipients
     
     async def get_all_dm_subscriptions_for_user(self, user_id: int) -> list:
         """Get all DM subscriptions for a specific user across all guilds"""
         try:
-            subscriptions = []
-            async for sub in self.dm_subscriptions_collection.find({
+            return await self._db(self._find, self.dm_subscriptions_collection, {
                 "user_id": user_id,
                 "enabled": True
-            }):
-                subscriptions.append(sub)
-            return subscriptions
+            })
+        except CircuitOpen:
+            return [{"user_id": user_id, "guild_id": guild_id, "enabled": True}
+                    for guild_id, users in self.dm_subscribers_cache.items() if user_id in users]
         except Exception as e:
-            print(f"Error getting all DM subscriptions for user {user_id}: {e}")
+            logger.error(f"Error getting all DM subscriptions for user {user_id}: {e}")
             return []
     
     def is_on_cooldown(self, member_id: int, guild_id: str) -> bool:
@@ -134,7 +415,7 @@ class SubscriptionManager(commands.Cog):
         last_notification = self.notification_cooldowns[member_id][guild_id]
         current_time = time.time()
         
-        return (current_time - last_notification) < self.cooldown_duration
+        return (current_time - last_notification) < self.cooldown_for(guild_id)
     
     def update_cooldown(self, member_id: int, guild_id: str):
         """Update the cooldown for a member in a specific guild"""
@@ -150,16 +431,18 @@ class SubscriptionManager(commands.Cog):
         
         last_notification = self.notification_cooldowns[member_id][guild_id]
         current_time = time.time()
-        remaining = self.cooldown_duration - (current_time - last_notification)
+        remaining = self.cooldown_for(guild_id) - (current_time - last_notification)
         
         return max(0, int(remaining))
     
     @commands.command(name='subscribe')
     @commands.has_permissions(manage_guild=True)
-    async def subscribe_command(self, ctx, channel: Optional[discord.TextChannel] = None):
+    async def subscribe_command(self, ctx, channel: Optional[discord.TextChannel] = None, mode: Optional[str] = None):
         """
         Subscribe this server to Sea of Thieves notifications
-        Usage: !subscribe [#channel]
+        Usage: !subscribe [#channel] [webhook]
+        With `webhook`, notifications are posted through a channel webhook so they don't
+        use the bot's own rate limits (needs the Manage Webhooks permission).
         """
         target_channel = channel if channel else ctx.channel
         
@@ -169,6 +452,8 @@ class SubscriptionManager(commands.Cog):
             return
         
         guild_id = str(ctx.guild.id)
+        previous = await self.get_subscription(guild_id) or {}
+        previous_webhook = previous.get("webhook_id")
         
         # Create subscription data
         subscription_data = {
@@ -177,11 +462,42 @@ class SubscriptionManager(commands.Cog):
             "channel_id": target_channel.id,
             "channel_name": target_channel.name,
             "enabled": True,
-            "notify_start": True
+            "notify_start": True,
+            "webhook_id": None,
+            "webhook_token": None
         }
+
+        use_webhook = mode is not None and mode.lower() == "webhook"
+        if use_webhook and previous_webhook and previous.get("webhook_token") \
+                and previous.get("channel_id") == target_channel.id:
+            # Same channel: keep the webhook we already have
+            subscription_data["webhook_id"] = previous_webhook
+            subscription_data["webhook_token"] = previous["webhook_token"]
+        elif use_webhook:
+            try:
+                webhook = await target_channel.create_webhook(name="GrebBot Notifications",
+                                                              reason="Sea of Thieves notifications")
+                subscription_data["webhook_id"] = webhook.id
+                subscription_data["webhook_token"] = webhook.token
+            except discord.Forbidden:
+                use_webhook = False
+                await ctx.send("⚠️ I need the **Manage Webhooks** permission to use a webhook; notifications will be sent normally.")
+            except discord.HTTPException as e:
+                use_webhook = False
+                logger.error(f"Error creating webhook in guild {guild_id}: {e}")
+
+        # A webhook that is no longer used is deleted, so they don't pile up towards Discord's per-channel limit
+        if previous_webhook and previous_webhook != subscription_data["webhook_id"]:
+            await self._delete_webhook(int(previous_webhook))
+        if previous.get("channel_id"):
+            self.channel_webhooks.pop(previous["channel_id"], None)
         
         # Save to MongoDB
         await self.save_subscription(guild_id, subscription_data)
+        if use_webhook:
+            self.channel_webhooks[target_channel.id] = (subscription_data["webhook_id"], subscription_data["webhook_token"])
+        else:
+            self.channel_webhooks.pop(target_channel.id, None)
         
         embed = discord.Embed(
             title="🏴‍☠️ Sea of Thieves Notifications",
@@ -190,6 +506,7 @@ class SubscriptionManager(commands.Cog):
         )
         embed.add_field(name="Notification Channel", value=target_channel.mention, inline=True)
         embed.add_field(name="Server", value=ctx.guild.name, inline=True)
+        embed.add_field(name="Delivery", value="Webhook" if use_webhook else "Bot", inline=True)
         
         await ctx.send(embed=embed)
     
@@ -203,8 +520,13 @@ class SubscriptionManager(commands.Cog):
         subscription = await self.get_subscription(guild_id)
         
         if subscription and subscription.get("enabled", False):
-            # Disable the subscription
+            # Disable the subscription and delete its webhook (its token would otherwise stay valid)
             subscription["enabled"] = False
+            if subscription.get("webhook_id"):
+                await self._delete_webhook(int(subscription["webhook_id"]))
+                subscription["webhook_id"] = None
+                subscription["webhook_token"] = None
+            self.channel_webhooks.pop(subscription.get("channel_id"), None)
             await self.save_subscription(guild_id, subscription)
             
             embed = discord.Embed(
@@ -235,6 +557,7 @@ class SubscriptionManager(commands.Cog):
             )
             embed.add_field(name="Channel", value=channel.mention if channel else "Channel not found", inline=True)
             embed.add_field(name="Start Notifications", value="✅" if subscription.get("notify_start", True) else "❌", inline=True)
+            embed.add_field(name="Delivery", value="Webhook" if subscription.get("webhook_id") else "Bot", inline=True)
             
             await ctx.send(embed=embed)
         else:
@@ -245,80 +568,300 @@ class SubscriptionManager(commands.Cog):
             )
             await ctx.send(embed=embed)
     
-    async def notify_sea_of_thieves_activity(self, member: discord.Member, activity_type: str):
-        """Send notification to subscribed servers with cooldown protection"""
+    def _notification_embed(self, config: GuildConfig, member, guilds: List, game: str, dm: bool = False) -> discord.Embed:
+        """Embed for a single player setting sail, seen from one or more servers"""
+        servers = ", ".join(guild.name for guild in guilds)
+        embed = discord.Embed(
+            title=config.notification_title,
+            description=render_template(config.notification_message, player=member.display_name,
+                                        game=game, server=servers),
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
+        embed.add_field(name="Player", value=member.display_name if dm else member.mention, inline=True)
+        if dm:
+            embed.add_field(name="Servers" if len(guilds) > 1 else "Server", value=servers[:1024], inline=True)
+        embed.add_field(name="Status", value="🚢 Setting Sail", inline=True)
+        return embed
+
+    def _digest_embed(self, config: GuildConfig, entries: List[Tuple], dm: bool = False) -> discord.Embed:
+        """One embed for several players who set sail within the digest window"""
+        names = []
+        guilds = []
+        for member, guild, _ in entries:
+            if member.display_name not in names:
+                names.append(member.display_name)
+            if guild not in guilds:
+                guilds.append(guild)
+        games = sorted({game for _, _, game in entries})
+
+        if len(names) == 1:
+            member, _, game = entries[0]
+            return self._notification_embed(config, member, guilds, game, dm=dm)
+
+        embed = discord.Embed(
+            title=config.notification_title,
+            description=f"🏴‍☠️ {summarize_names(names)} set sail in **{' / '.join(games)}**!",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="Crew", value=", ".join(names)[:1024], inline=False)
+        if dm:
+            embed.add_field(name="Servers" if len(guilds) > 1 else "Server",
+                            value=", ".join(guild.name for guild in guilds)[:1024], inline=True)
+        embed.add_field(name="Status", value="🚢 Setting Sail", inline=True)
+        return embed
+
+    async def _send_to_channel(self, channel, embed: discord.Embed):
+        """Deliver through the channel's webhook when it has one, otherwise through the bot"""
+        self.channel_api_calls[channel.id] += 1
+        webhook = self.channel_webhooks.get(channel.id)
+        if webhook:
+            webhook_id, webhook_token = webhook
+            try:
+                bot_user = self.bot.user
+                await self.webhook_delivery.send_embed(
+                    webhook_id, webhook_token, embed.to_dict(),
+                    username=bot_user.name if bot_user else None,
+                    avatar_url=bot_user.display_avatar.url if bot_user else None
+                )
+                return
+            except WebhookGone:
+                logger.warning(f"Webhook for channel {channel.id} was deleted, falling back to the bot")
+                self.channel_webhooks.pop(channel.id, None)
+                await self._forget_webhook(channel.guild.id)
+            except Exception as e:
+                logger.error(f"Error delivering through webhook for channel {channel.id}: {e}")
+        await channel.send(embed=embed)
+
+    async def _delete_webhook(self, webhook_id: int):
+        """Delete a webhook this bot created; already gone counts as done"""
+        try:
+            webhook = await self.bot.fetch_webhook(webhook_id)
+            await webhook.delete(reason="Sea of Thieves notifications moved or stopped")
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"Could not delete webhook {webhook_id}: {e}")
+
+    async def _forget_webhook(self, guild_id: int):
+        """Drop a deleted webhook from the stored subscription"""
+        cached = self.subscriptions_cache.get(str(guild_id))
+        if cached:
+            cached.pop("webhook_id", None)
+            cached.pop("webhook_token", None)
+        saved = False
+        try:
+            await self._db(
+                self.subscriptions_collection.update_one,
+                {"guild_id": str(guild_id)},
+                {"$unset": {"webhook_id": "", "webhook_token": ""}}
+            )
+            saved = True
+        except Exception as e:
+            logger.error(f"Error removing webhook for guild {guild_id}: {e}")
+        if self.local_store:
+            await asyncio.to_thread(self.local_store.save_subscription, str(guild_id), {}, dirty=not saved,
+                                    unset=("webhook_id", "webhook_token"))
+
+    async def _send_dm(self, user_id: int, embed: discord.Embed):
+        user = self.bot.get_user(user_id)
+        if not user:
+            return
+        try:
+            await user.send(embed=embed)
+            self.dm_api_calls[user_id] += 1
+            logger.info(f"Sent DM notification to {user.name}")
+        except discord.Forbidden:
+            logger.warning(f"Could not send DM to user {user_id} - DMs might be disabled")
+        except Exception as e:
+            logger.error(f"Error sending DM to user {user_id}: {e}")
+
+    def _queue_digest(self, digests: Dict[int, "PendingDigest"], kind: str, key: int,
+                      entry: Tuple, config: GuildConfig):
+        """Add an entry to a digest, starting its flush timer if this is the first one"""
+        pending = digests.get(key)
+        if pending is None:
+            pending = PendingDigest(config)
+            digests[key] = pending
+            pending.task = asyncio.create_task(self._flush_digest_later(kind, key, config.digest_window))
+        pending.entries.append(entry)
+
+    async def _flush_digest_later(self, kind: str, key: int, delay: float):
+        await asyncio.sleep(delay)
+        await self._flush_digest(kind, key)
+
+    async def _flush_digest(self, kind: str, key: int):
+        """Send one aggregated notification for everything collected for a channel or DM recipient"""
+        digests = self.channel_digests if kind == "channel" else self.dm_digests
+        pending = digests.pop(key, None)
+        if pending is None or not pending.entries:
+            return
+        try:
+            if kind == "channel":
+                channel = self.bot.get_channel(key)
+                if channel:
+                    logger.info(f"Sending digest of {len(pending.entries)} notification(s) to {channel.name}")
+                    await self._send_to_channel(channel, self._digest_embed(pending.config, pending.entries))
+            else:
+                await self._send_dm(key, self._digest_embed(pending.config, pending.entries, dm=True))
+        except Exception as e:
+            logger.error(f"Error sending {kind} digest for {key}: {e}")
+
+    async def flush_digests(self):
+        """Send every pending digest now instead of waiting for its window to close"""
+        for kind, digests in (("channel", self.channel_digests), ("dm", self.dm_digests)):
+            for key in list(digests):
+                pending = digests.get(key)
+                if pending and pending.task and pending.task is not asyncio.current_task():
+                    pending.task.cancel()
+                await self._flush_digest(kind, key)
+
+    async def flush_digests_within(self, timeout: float) -> bool:
+        """flush_digests() bounded by ``timeout``; digests it didn't get to are dropped. False if any were"""
+        if not self.channel_digests and not self.dm_digests:
+            return True
+        try:
+            await asyncio.wait_for(self.flush_digests(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            dropped = 0
+            for digests in (self.channel_digests, self.dm_digests):
+                for pending in digests.values():
+                    if pending.task:
+                        pending.task.cancel()
+                    dropped += len(pending.entries)
+                digests.clear()
+            logger.warning(f"Gave up sending pending digests after {timeout:.1f}s, dropped {dropped} notification(s)")
+            return False
+
+    async def drain(self, timeout: float) -> bool:
+        """Let in-flight notifications finish and send pending digests; False if ``timeout`` ran out first"""
+        deadline = time.monotonic() + timeout
+        self._drained = True
+        drained = True
+        inflight = [task for task in self._inflight if task is not asyncio.current_task()]
+        if inflight:
+            logger.info(f"Waiting for {len(inflight)} notification(s) in flight")
+            _, still_running = await asyncio.wait(inflight, timeout=timeout)
+            if still_running:
+                logger.warning(f"{len(still_running)} notification(s) still in flight after {timeout}s")
+                drained = False
+        # Digests get whatever is left of the budget, even if that is nothing
+        return await self.flush_digests_within(max(0.0, deadline - time.monotonic())) and drained
+
+    async def notify_sea_of_thieves_activity(self, member: discord.Member, activity_type: str,
+                                             game: str = "Sea of Thieves"):
+        """Send notification to subscribed servers that track the game, with cooldown protection"""
+        if activity_type != "start":
+            return
+
+        task = asyncio.current_task()
+        self._inflight.add(task)
+        try:
+            await self._notify(member, game)
+        finally:
+            self._inflight.discard(task)
+
+    async def _notify(self, member: discord.Member, game: str):
         # Get all active subscriptions from MongoDB
         subscriptions = await self.get_all_subscriptions()
-        
+
+        # Plan: every guild that should announce this launch, with its channel and settings
+        matched = []
         for guild_id, sub in subscriptions.items():
-            if not sub.get("enabled", False):
+            if not sub.get("enabled", False) or not sub.get("notify_start", True):
                 continue
             
             # Check if member is in this guild
             guild = self.bot.get_guild(int(guild_id))
-            if not guild or member not in guild.members:
+            if not guild or guild.get_member(member.id) is None:
                 continue
-            
-            # Check notification preferences - only check for start notifications
-            if activity_type == "start" and not sub.get("notify_start", True):
+
+            # Only guilds that track this game
+            config = self.guild_config(guild_id)
+            if game.lower() not in config.tracked_games:
                 continue
             
             # Check cooldown - prevent spam notifications
             if self.is_on_cooldown(member.id, guild_id):
                 remaining = self.get_cooldown_remaining(member.id, guild_id)
-                print(f"🕒 Cooldown active for {member.name} in {guild.name} - {remaining}s remaining")
+                logger.debug(f"🕒 Cooldown active for {member.name} in {guild.name} - {remaining}s remaining")
                 continue
             
             # Get notification channel
             channel = self.bot.get_channel(sub["channel_id"])
             if not channel:
                 continue
-            
-            # Create and send notification (only for game start)
+
+            if sub.get("webhook_id") and sub.get("webhook_token"):
+                self.channel_webhooks[channel.id] = (int(sub["webhook_id"]), sub["webhook_token"])
+            else:
+                self.channel_webhooks.pop(channel.id, None)
+
+            # Claim the cooldown before the first await so concurrent presence events
+            # for the same member can't both pass the check above
+            self.update_cooldown(member.id, guild_id)
+            self.notification_events[guild_id] += 1
+            matched.append((guild_id, guild, channel, config))
+
+        if not matched:
+            return
+
+        # Unique DM recipients across every matched guild, so shared subscribers get one DM
+        recipients = await self.get_dm_recipients_for_guilds([guild_id for guild_id, _, _, _ in matched])
+        recipients.pop(member.id, None)  # Don't DM the player themselves
+        by_guild_id = {guild_id: (guild, config) for guild_id, guild, _, config in matched}
+
+        # Channel notifications, one per guild
+        for guild_id, guild, channel, config in matched:
             try:
-                if activity_type == "start":
-                    embed = discord.Embed(
-                        title="⚓ Ahoy you fucks!",
-                        description=f"🏴‍☠️ **{member.display_name}** has set sail in **Sea of Thieves**!",
-                        color=discord.Color.blue(),
-                        timestamp=discord.utils.utcnow()
-                    )
-                    embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
-                    embed.add_field(name="Player", value=member.mention, inline=True)
-                    embed.add_field(name="Status", value="🚢 Setting Sail", inline=True)
-                    
-                    print(f"Sending Sea of Thieves notification to {guild.name} in {channel.name}")
-                    await channel.send(embed=embed)
-                    
-                    # Send DMs to subscribed users in this guild
-                    dm_subscribers = await self.get_dm_subscribers_for_guild(guild_id)
-                    for user_id in dm_subscribers:
-                        try:
-                            user = self.bot.get_user(user_id)
-                            if user and user != member:  # Don't DM the player themselves
-                                dm_embed = discord.Embed(
-                                    title="⚓ Ahoy you fucks!",
-                                    description=f"🏴‍☠️ **{member.display_name}** has set sail in **Sea of Thieves** in **{guild.name}**!",
-                                    color=discord.Color.blue(),
-                                    timestamp=discord.utils.utcnow()
-                                )
-                                dm_embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
-                                dm_embed.add_field(name="Player", value=member.display_name, inline=True)
-                                dm_embed.add_field(name="Server", value=guild.name, inline=True)
-                                dm_embed.add_field(name="Status", value="🚢 Setting Sail", inline=True)
-                                
-                                await user.send(embed=dm_embed)
-                                print(f"Sent DM notification to {user.name} for {member.display_name} in {guild.name}")
-                        except discord.Forbidden:
-                            print(f"Could not send DM to user {user_id} - DMs might be disabled")
-                        except Exception as e:
-                            print(f"Error sending DM to user {user_id}: {e}")
-                    
-                    # Update cooldown after successful notification
-                    self.update_cooldown(member.id, guild_id)
-                
+                if config.digest_window > 0:
+                    # Digest mode: collect everyone who sets sail within the window into one message
+                    self._queue_digest(self.channel_digests, "channel", channel.id, (member, guild, game), config)
+                else:
+                    logger.info(f"Sending {game} notification to {guild.name} in {channel.name}")
+                    await self._send_to_channel(channel, self._notification_embed(config, member, [guild], game))
             except Exception as e:
-                print(f"Error sending notification to {guild.name}: {e}")
+                logger.error(f"Error sending notification to {guild.name}: {e}")
+
+        # One consolidated DM per recipient listing every server they're subscribed through
+        for user_id, guild_ids in recipients.items():
+            guilds = [by_guild_id[guild_id][0] for guild_id in guild_ids]
+            config = by_guild_id[guild_ids[0]][1]
+            if config.digest_window > 0:
+                for guild in guilds:
+                    self._queue_digest(self.dm_digests, "dm", user_id, (member, guild, game), config)
+            else:
+                await self._send_dm(user_id, self._notification_embed(config, member, guilds, game, dm=True))
+
+    @commands.command(name='delivery_stats')
+    @commands.has_permissions(manage_guild=True)
+    async def delivery_stats_command(self, ctx):
+        """Show how many Discord API calls notifications for this server have used"""
+        guild_id = str(ctx.guild.id)
+        subscription = await self.get_subscription(guild_id)
+        channel_id = subscription.get("channel_id") if subscription else None
+
+        events = self.notification_events.get(guild_id, 0)
+        channel_calls = self.channel_api_calls.get(channel_id, 0)
+        config = self.guild_config(guild_id)
+
+        embed = discord.Embed(title="📊 Notification Delivery", color=discord.Color.blue())
+        embed.add_field(name="Players Notified", value=str(events), inline=True)
+        embed.add_field(name="Channel API Calls", value=str(channel_calls), inline=True)
+        embed.add_field(name="Digest Window", value=f"{config.digest_window}s" if config.digest_window else "Off", inline=True)
+        if self.dm_api_calls:
+            total_dm_calls = sum(self.dm_api_calls.values())
+            embed.add_field(
+                name="DM API Calls (all servers)",
+                value=f"{total_dm_calls} to {len(self.dm_api_calls)} recipient(s), "
+                      f"{total_dm_calls / len(self.dm_api_calls):.1f} per recipient",
+                inline=False
+            )
+        embed.set_footer(text="Counters survive reloads and graceful restarts")
+        await ctx.send(embed=embed)
     
     @commands.command(name='cooldown_status')
     @commands.has_permissions(manage_guild=True)
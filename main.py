@@ -3,16 +3,33 @@ from discord.ext import commands
 import os
 import asyncio
 from dotenv import load_dotenv
+
+# Load environment variables from .env file, before the local imports below:
+# several of them (loop watchdog, health probe) read their settings at import time
+load_dotenv()
+
 from art import text2art
 import threading
+import logging
+import signal
 from web_interface import BotWebInterface, run_web_interface
-
-# Load environment variables from .env file
-load_dotenv()
+from utils.cog_state import collect_state, stage_state
+from utils.event_stats import event_stats
+from utils.gateway_recorder import GatewayRecorder
+from utils.health import health_probe
+from utils.logging_setup import setup_logging, set_web_sink, shutdown_logging
+from utils.loop_watchdog import watchdog as loop_watchdog
+from utils.ratelimit_telemetry import telemetry as ratelimit_telemetry
+from utils.runtime_snapshot import load_snapshot, save_snapshot
+from cogs.guild_settings import DEFAULT_PREFIX
 
 # Check if DEBUG MODE is enabled
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() in ['true', '1', 'yes']
 
+# Structured logging: everything goes through a queue so the event loop never blocks on I/O
+setup_logging(debug=DEBUG_MODE)
+logger = logging.getLogger('grebbot')
+
 # Bot setup with intents
 intents = discord.Intents.default()
 intents.message_content = True  # Required for reading message content
@@ -22,43 +39,70 @@ intents.members = True  # Required for member updates
 # Banner
 VERSION = os.getenv('VERSION', 'ERROR')  # Get version from environment variable
 print(text2art(F"GrebBot - Discord Bot \nv{VERSION}"))
-print("Starting GrebBot...")
+logger.info("Starting GrebBot...")
 
 
 
-# Create bot instance with command prefix
 if DEBUG_MODE:
-    print("⚠️ DEBUG MODE is ON ⚠️")
-    command_prefix = '$'
-else:
-    command_prefix = '!'
+    logger.warning("⚠️ DEBUG MODE is ON ⚠️")
+
 
-bot = commands.Bot(command_prefix=command_prefix, intents=intents)
+def get_prefix(bot, message):
+    """Resolve the command prefix per guild from the in-memory GuildSettings map"""
+    guild_settings = bot.get_cog('GuildSettings')
+    if guild_settings is None:
+        return DEFAULT_PREFIX
+    return guild_settings.prefix_for(message.guild.id if message.guild else None)
+
+# Optional gateway recording for offline replay (see benchmarks/replay.py)
+GATEWAY_RECORD_PATH = os.getenv('GATEWAY_RECORD_PATH')
+
+# Create bot instance with a per-guild command prefix
+bot = commands.Bot(command_prefix=get_prefix, intents=intents,
+                   enable_debug_events=bool(GATEWAY_RECORD_PATH))
+
+# Per-route request counts, 429s and retry sleeps, served at /api/ratelimits
+ratelimit_telemetry.install(bot.http)
+# Events per type and guild, and time spent in each listener, served at /api/events/stats
+event_stats.install(bot)
+
+gateway_recorder = None
+if GATEWAY_RECORD_PATH:
+    gateway_recorder = GatewayRecorder(GATEWAY_RECORD_PATH)
+    bot.add_listener(gateway_recorder.on_socket_raw_receive)
+    logger.info(f"⏺️ Recording gateway events to {GATEWAY_RECORD_PATH}")
+
+# Runtime state (cooldowns, caches, open sessions, dashboard logs) kept across restarts
+STATE_SNAPSHOT_PATH = os.getenv('STATE_SNAPSHOT_PATH', 'data/runtime_state.json.gz')
+STATE_SNAPSHOT_MAX_AGE = float(os.getenv('STATE_SNAPSHOT_MAX_AGE', '900'))  # seconds
+# How long shutdown waits for notifications in flight (keep below Docker's stop timeout, 10s by default)
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '5'))
 
 # Initialize web interface
 web_interface = None
+restored_logs = []
+shutdown_task = None
 
 @bot.event
 async def on_ready():
     """Event triggered when bot is ready"""
     global web_interface
 
-    # Initialize web interface with bot instance
-    web_interface = BotWebInterface(bot)
-    web_interface.add_log(f"Bot {bot.user} has logged in!", "INFO")
+    # Initialize web interface with bot instance (on_ready fires again after reconnects)
+    if web_interface is None:
+        web_interface = BotWebInterface(bot, logs=restored_logs)
+        set_web_sink(web_interface.add_log)
 
     status = os.getenv('bot_status', 'playing with <code>')
 
-    print(f'{bot.user} has logged in!')
-    print(f'Bot ID: {bot.user.id}')
+    logger.info(f'Bot {bot.user} has logged in!', extra={'bot_id': bot.user.id})
     
     # Set bot status
     await bot.change_presence(
         activity=discord.Game(name=status),
         status=discord.Status.online
     )
-    print(f'Status set to: {status}')
-    web_interface.add_log(f"Status set to: {status}", "INFO")
+    logger.info(f'Status set to: {status}')
 
 @bot.event
 async def on_message(message):
@@ -67,19 +111,17 @@ async def on_message(message):
     if message.author == bot.user:
         return
     
-    # Log all messages (optional - remove if not needed)
-    print(f'Message from [{message.author}: {message.content}]', end=' ')
-    if message.guild  and DEBUG_MODE:
-        print(f"Channel: {message.channel.name} | Guild: {message.guild.name}")
-    elif DEBUG_MODE:
-        print(f"Direct Message from {message.author}")
-    
-    # Respond to specific non-command messages
-    if message.content.lower() == 'hello':
-        await message.channel.send(f'Hello {message.author.mention}!')
-    elif message.content.lower() == 'ping':
-        await message.channel.send('Pong!')
+    # Sampled, content-free message log (ids and length only)
+    logger.debug("Message received", extra={
+        'sample': 'message',
+        'author_id': message.author.id,
+        'guild_id': message.guild.id if message.guild else None,
+        'channel_id': message.channel.id,
+        'length': len(message.content),
+    })
     
+    # Trigger replies such as 'hello' / 'ping' are handled by the AutoResponder cog
+
     # Process commands (important: this must be at the end)
     await bot.process_commands(message)
 
@@ -87,20 +129,14 @@ async def on_message(message):
 @bot.event
 async def on_command_error(ctx, error):
     """Handle command errors"""
-    global web_interface
-
     if isinstance(error, commands.CommandNotFound):
-        await ctx.send(f"Command not found! Use `!help` to see available commands.")
-        if web_interface:
-            web_interface.add_log(f"Command not found: {ctx.message.content}", "WARNING")
+        await ctx.send(f"Command not found! Use `{ctx.clean_prefix}help` to see available commands.")
+        logger.warning(f"Command not found: {ctx.invoked_with}")
     elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send(f"Missing required argument! Check the command usage with `!help <command>`")
-        if web_interface:
-            web_interface.add_log(f"Missing argument for command: {ctx.command.name}", "WARNING")
+        await ctx.send(f"Missing required argument! Check the command usage with `{ctx.clean_prefix}help <command>`")
+        logger.warning(f"Missing argument for command: {ctx.command.name}")
     else:
-        print(f"An error occurred: {error}")
-        if web_interface:
-            web_interface.add_log(f"Error: {str(error)}", "ERROR")
+        logger.error(f"Error: {error}", extra={'command': ctx.command.name if ctx.command else None})
         if (isinstance(error, commands.errors.CommandInvokeError) and DEBUG_MODE):
             await ctx.send("I don't have permission to delete the command message :(")
         else:
@@ -115,39 +151,101 @@ async def load_cogs():
         await bot.load_extension('cogs.advanced_commands')
         await bot.load_extension('cogs.presenceChanges')
         await bot.load_extension('cogs.subscription_manager')
-        print("✅ Loaded cogs: basic_commands, advanced_commands, presenceChanges, subscription_manager")
+        # Needs the SubscriptionManager's database; loads every guild's settings in bulk
+        await bot.load_extension('cogs.guild_settings')
+        await bot.load_extension('cogs.auto_responder')
+        await bot.load_extension('cogs.play_sessions')
+        await bot.load_extension('cogs.diagnostics')
+        logger.info("✅ Loaded cogs: basic_commands, advanced_commands, presenceChanges, subscription_manager, guild_settings, auto_responder, play_sessions, diagnostics")
     except Exception as e:
-        print(f"❌ Failed to load cogs: {e}")
+        logger.exception(f"❌ Failed to load cogs: {e}")
+
+
+def restore_state():
+    """Stage the state saved at the last shutdown; cogs pick it up as they load, before READY"""
+    global restored_logs
+    if not STATE_SNAPSHOT_PATH:
+        return
+    snapshot = load_snapshot(STATE_SNAPSHOT_PATH, STATE_SNAPSHOT_MAX_AGE)
+    if snapshot is None:
+        return
+    stage_state(bot, snapshot["cogs"])
+    restored_logs = snapshot.get("logs", [])
+    logger.info(f"♻️ Restored runtime state of {', '.join(snapshot['cogs']) or 'no cogs'} from {STATE_SNAPSHOT_PATH}")
 
 
+async def shutdown(reason: str):
+    """Let pending notifications go out, snapshot runtime state and disconnect"""
+    logger.info(f"🛑 Shutting down ({reason})")
+    subscription_manager = bot.get_cog('SubscriptionManager')
+    if subscription_manager:
+        await subscription_manager.drain(SHUTDOWN_DRAIN_TIMEOUT)
+
+    # Collected and written before close(): unloading the cogs can outlast the stop timeout,
+    # and the snapshot is what a SIGKILL must not take with it
+    states = collect_state(bot)
+    logs = list(web_interface.logs) if web_interface else []
+    if STATE_SNAPSHOT_PATH:
+        try:
+            size = await asyncio.to_thread(save_snapshot, STATE_SNAPSHOT_PATH, states, logs)
+            logger.info(f"💾 Saved runtime state ({size} bytes) to {STATE_SNAPSHOT_PATH}")
+        except Exception as e:
+            logger.exception(f"Could not save runtime state: {e}")
+
+    await bot.close()
+
+
+def request_shutdown(sig):
+    global shutdown_task
+    if shutdown_task is None:
+        shutdown_task = asyncio.create_task(shutdown(sig.name))
 
 
 # Run the bot
 async def main():
     """Main function to start the bot"""
-
-
-    # Load cogs first
+    # Measure event loop lag and capture what blocks it, served at /api/loop
+    loop_watchdog.start()
+    # Cached health record behind /healthz and /readyz
+    health_probe.start(bot)
+
+    # SIGTERM from `docker stop` (and Ctrl+C) shut down gracefully instead of cutting sends off
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_shutdown, sig)
+        except (NotImplementedError, RuntimeError):
+            pass  # not supported on this platform
+
+    # Load cogs first (with the state saved at the last shutdown)
+    restore_state()
     await load_cogs()
     
     # Get token from environment variables
     token = os.getenv('DISCORD_TOKEN')
     
     if not token:
-        print("Error: DISCORD_TOKEN not found in .env file!")
-        print("Please add your Discord bot token to the .env file.")
+        logger.error("Error: DISCORD_TOKEN not found in .env file! Please add your Discord bot token to the .env file.")
         return
     
     try:
         await bot.start(token)
     except discord.LoginFailure:
-        print("Error: Invalid Discord token!")
+        logger.error("Error: Invalid Discord token!")
     except Exception as e:
-        print(f"Error starting bot: {e}")
+        logger.exception(f"Error starting bot: {e}")
+    finally:
+        if shutdown_task:
+            await shutdown_task
+        health_probe.stop()
+        loop_watchdog.stop()
+        if gateway_recorder:
+            gateway_recorder.close()
+        shutdown_logging()
 
 if __name__ == "__main__":
     # Start the web interface in a separate thread
-    web_thread = threading.Thread(target=run_web_interface, daemon=True)
+    web_thread = threading.Thread(target=run_web_interface, name="web", daemon=True)
     web_thread.start()
 
     # Run the bot
@@ -0,0 +1,50 @@
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from cogs.auto_responder import TriggerMatcher
+from utils.cog_state import reload_extension
+
+
+def matcher(*triggers):
+    return TriggerMatcher([{"trigger": trigger, "response": f"re: {trigger}", "match": match}
+                           for trigger, match in triggers])
+
+
+def test_contains_is_case_insensitive():
+    assert matcher(("kiss", "contains")).match("a KISS goodbye") == ("kiss", "re: kiss")
+
+
+def test_contains_with_non_ascii_case_folding():
+    # 'ſ' (long s) matches 's' under IGNORECASE but doesn't lowercase to it
+    assert matcher(("kiss", "contains")).match("Kiſs") == ("kiss", "re: kiss")
+    assert matcher(("s", "contains")).match("ſ") == ("s", "re: s")
+
+
+def test_longest_contains_trigger_wins():
+    found = matcher(("sea", "contains"), ("sea of thieves", "contains")).match("playing Sea of Thieves")
+    assert found == ("sea of thieves", "re: sea of thieves")
+
+
+def test_exact_and_no_match():
+    m = matcher(("hello", "exact"))
+    assert m.match("HELLO") == ("hello", "re: hello")
+    assert m.match("hello there") is None
+
+
+def test_custom_triggers_survive_reload():
+    async def scenario():
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        await bot.load_extension("cogs.auto_responder")
+        await bot.get_cog("AutoResponder")._save_trigger(1, "ahoy", "Ahoy {mention}!", "contains")
+
+        assert await reload_extension(bot, "cogs.auto_responder") == ["AutoResponder"]
+        cog = bot.get_cog("AutoResponder")
+        assert cog.guild_triggers[1][0]["trigger"] == "ahoy"
+        assert cog.matchers[1].match("well ahoy there") == ("ahoy", "Ahoy {mention}!")
+        # Defaults are still merged in
+        assert cog.matchers[1].match("ping") == ("ping", "Pong!")
+        await bot.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+
+from utils.ratelimit_telemetry import RateLimitTelemetry
+
+
+class FakeRoute:
+    key = "POST /channels/{channel_id}/messages"
+
+
+class FakeHTTP:
+    async def request(self, route, **kwargs):
+        # What discord.py logs before sleeping out a 429 and retrying
+        logging.getLogger("discord.http").warning(
+            'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+            "POST", "https://discord.com/api/v10/channels/1/messages", 1.5,
+        )
+        return {}
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_429_counted_with_discord_logger_at_error():
+    discord_logger, http_logger = logging.getLogger("discord"), logging.getLogger("discord.http")
+    saved = discord_logger.level, http_logger.level, list(http_logger.filters)
+    collected = Collect()
+    discord_logger.setLevel(logging.ERROR)
+    discord_logger.addHandler(collected)
+    try:
+        telemetry = RateLimitTelemetry()
+        http = FakeHTTP()
+        telemetry.install(http)
+        asyncio.run(http.request(FakeRoute()))
+
+        stats = telemetry.routes[FakeRoute.key]
+        assert (stats.requests, stats.rate_limited, stats.slept) == (1, 1, 1.5)
+        # Still suppressed as far as log output goes
+        assert collected.records == []
+    finally:
+        discord_logger.removeHandler(collected)
+        discord_logger.setLevel(saved[0])
+        http_logger.setLevel(saved[1])
+        http_logger.filters[:] = saved[2]
@@ -0,0 +1,83 @@
+"""Runtime state handed from one instance of a cog to the next.
+
+Cogs whose in-memory state is worth keeping (cooldowns, open sessions, the
+live presence index) implement ``export_state() -> dict`` returning plain,
+JSON-safe data and pick it back up in ``__init__`` with ``take_state``. The
+state is therefore in place before ``cog_load`` runs or any event reaches the
+new instance, so a reload never looks like a fresh start.
+"""
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# States waiting for the next instance of each cog: {cog name: state}
+_PENDING_ATTR = "pending_cog_state"
+
+
+def collect_state(bot, module: Optional[str] = None) -> Dict[str, Dict]:
+    """export_state() of every loaded cog, or only of the cogs defined in ``module``"""
+    states: Dict[str, Dict] = {}
+    for name, cog in list(bot.cogs.items()):
+        if module is not None and type(cog).__module__ != module:
+            continue
+        export = getattr(cog, "export_state", None)
+        if export is None:
+            continue
+        try:
+            states[name] = export()
+        except Exception as e:
+            logger.exception(f"Could not export the state of {name}: {e}")
+    return states
+
+
+def stage_state(bot, states: Dict[str, Dict]):
+    """Hold states until the matching cogs are next constructed"""
+    pending = getattr(bot, _PENDING_ATTR, None)
+    if pending is None:
+        pending = {}
+        setattr(bot, _PENDING_ATTR, pending)
+    pending.update(states)
+
+
+def take_state(bot, cog) -> Optional[Dict]:
+    """The state staged for ``cog``, if any (consumed)"""
+    pending = getattr(bot, _PENDING_ATTR, None)
+    if not pending:
+        return None
+    return pending.pop(cog.qualified_name, None)
+
+
+def discard_state(bot, names: List[str]):
+    pending = getattr(bot, _PENDING_ATTR, None)
+    if pending:
+        for name in names:
+            pending.pop(name, None)
+
+
+def resolve_extension(bot, name: str) -> Optional[str]:
+    """Loaded extension for 'cogs.play_sessions', 'play_sessions' or a cog name like 'PlaySessions'"""
+    for candidate in (name, f"cogs.{name}"):
+        if candidate in bot.extensions:
+            return candidate
+    for cog_name, cog in bot.cogs.items():
+        if cog_name.lower() == name.lower() and type(cog).__module__ in bot.extensions:
+            return type(cog).__module__
+    return None
+
+
+async def reload_extension(bot, extension: str) -> List[str]:
+    """Reload an extension in place, handing its cogs' state to the new instances.
+
+    Returns the names of the cogs whose state was carried over. If the new code
+    fails to load, discord.py puts the old module back and it gets the state instead.
+    """
+    states = collect_state(bot, extension)
+    stage_state(bot, states)
+    try:
+        await bot.reload_extension(extension)
+    finally:
+        # Whatever wasn't picked up (renamed cog, failed load) must not leak into a later load
+        discard_state(bot, list(states))
+    logger.info(f"🔄 Reloaded {extension}" + (f" (state kept for {', '.join(states)})" if states else ""))
+    return list(states)
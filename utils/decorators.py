@@ -1,8 +1,12 @@
+import logging
 import time
 
 from discord.ext import commands
 
 
+logger = logging.getLogger(__name__)
+
+
 def admin_only():
     async def predicate(ctx):
         return ctx.author.guild_permissions.administrator
@@ -15,7 +19,7 @@ def timer(func):
         t0 = time.perf_counter()
         result = func(*args, **kwargs)
         dt = time.perf_counter() - t0
-        print(f"{func.__name__} call took {dt:.6f}s")
+        logger.info(f"{func.__name__} call took {dt:.6f}s")
         return result
 
     return wrapper
@@ -0,0 +1,151 @@
+"""Gateway event throughput and handler cost, measured at dispatch.
+
+``install(bot)`` wraps ``bot.dispatch`` (also the reference the connection
+state holds) to count every event by type and by guild, and ``bot._run_event``
+to time each listener call. Counts are kept in one-second buckets so rates are
+over a rolling window; handler time is cumulative per listener.
+
+Handler time is wall time and includes the listener's own awaits (database,
+HTTP), so it shows where events spend their time, not only CPU.
+"""
+import logging
+import time
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+def _guild_id(args: tuple) -> Optional[int]:
+    """Guild an event belongs to, from its first arguments (Member, Message, Guild or a raw payload)"""
+    for arg in args[:2]:
+        if isinstance(arg, discord.Guild):
+            return arg.id
+        guild = getattr(arg, "guild", None)
+        if guild is not None:
+            return getattr(guild, "id", None)
+        guild_id = getattr(arg, "guild_id", None)
+        if guild_id is not None:
+            return guild_id
+    return None
+
+
+class ListenerStats:
+    __slots__ = ("calls", "total_time", "max_time")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "total_seconds": round(self.total_time, 3),
+            "avg_ms": round(self.total_time / self.calls * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_time * 1000, 2),
+        }
+
+
+class EventStats:
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.started = time.time()
+        self.totals: Counter = Counter()  # {event: count} since start
+        # Completed one-second buckets, oldest first: (second, Counter{(event, guild_id): count})
+        self._buckets: deque = deque(maxlen=window)
+        self._second = 0
+        self._current: Counter = Counter()
+        # {listener qualname, e.g. "PresenceChanges.on_presence_update": stats}
+        self.listeners: Dict[str, ListenerStats] = {}
+        self._bot = None
+
+    def install(self, bot):
+        """Wrap dispatch and listener execution (idempotent)"""
+        if self._bot is bot:
+            return
+        self._bot = bot
+        original_dispatch = bot.dispatch
+        original_run_event = bot._run_event
+
+        def instrumented_dispatch(event_name, *args, **kwargs):
+            self.record_event(event_name, args)
+            original_dispatch(event_name, *args, **kwargs)
+
+        async def instrumented_run_event(coro, event_name, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                await original_run_event(coro, event_name, *args, **kwargs)
+            finally:
+                self.record_handler(getattr(coro, "__qualname__", event_name), time.perf_counter() - start)
+
+        bot.dispatch = instrumented_dispatch
+        # The gateway and connection state keep their own reference to dispatch
+        bot._connection.dispatch = instrumented_dispatch
+        bot._run_event = instrumented_run_event
+
+    def record_event(self, event: str, args: tuple = ()):
+        second = int(time.monotonic())
+        if second != self._second:
+            if self._current:
+                self._buckets.append((self._second, self._current))
+            self._second, self._current = second, Counter()
+        self._current[(event, _guild_id(args))] += 1
+        self.totals[event] += 1
+
+    def record_handler(self, name: str, elapsed: float):
+        stats = self.listeners.get(name)
+        if stats is None:
+            stats = self.listeners[name] = ListenerStats()
+        stats.calls += 1
+        stats.total_time += elapsed
+        if elapsed > stats.max_time:
+            stats.max_time = elapsed
+
+    def _window_counts(self) -> Tuple[Counter, float]:
+        """Counts over the completed buckets inside the window, and the seconds they cover"""
+        now = int(time.monotonic())
+        counts: Counter = Counter()
+        for second, bucket in list(self._buckets):
+            if second >= now - self.window:
+                counts.update(bucket)
+        # Shorter right after startup
+        return counts, float(max(1, min(self.window, time.time() - self.started)))
+
+    def snapshot(self, top: int = 10, guild_names: Optional[Dict[int, str]] = None) -> Dict:
+        counts, seconds = self._window_counts()
+        by_event: Counter = Counter()
+        by_guild: Dict[Optional[int], Counter] = {}
+        for (event, guild_id), n in counts.items():
+            by_event[event] += n
+            by_guild.setdefault(guild_id, Counter())[event] += n
+
+        noisiest = sorted(((guild_id, events) for guild_id, events in by_guild.items() if guild_id is not None),
+                          key=lambda item: sum(item[1].values()), reverse=True)[:top]
+        listeners = sorted(list(self.listeners.items()), key=lambda item: item[1].total_time, reverse=True)
+
+        cogs: Dict[str, float] = {}
+        for name, stats in listeners:
+            cog = name.split(".")[0] if "." in name else "Bot"
+            cogs[cog] = cogs.get(cog, 0.0) + stats.total_time
+
+        return {
+            "window_seconds": self.window,
+            "uptime_seconds": round(time.time() - self.started),
+            "events_per_second": {event: round(n / seconds, 2) for event, n in by_event.most_common()},
+            "totals": dict(self.totals),
+            "guilds": [{
+                "guild_id": str(guild_id),
+                "name": (guild_names or {}).get(guild_id),
+                "events_per_second": round(sum(events.values()) / seconds, 2),
+                "by_event": {event: round(n / seconds, 2) for event, n in events.most_common(5)},
+            } for guild_id, events in noisiest],
+            "listeners": {name: stats.to_dict() for name, stats in listeners[:top * 2]},
+            "cogs": {cog: round(total, 3) for cog, total in sorted(cogs.items(), key=lambda item: item[1], reverse=True)},
+        }
+
+
+# Installed from main.py, served at /api/events/stats
+event_stats = EventStats()
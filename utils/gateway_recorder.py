@@ -0,0 +1,157 @@
+"""Record raw gateway dispatches to a compact, anonymized file for offline replay.
+
+Enabled from ``main.py`` by setting ``GATEWAY_RECORD_PATH``. Only the events the
+cogs react to are kept (presence, member and message events) and every ID is
+replaced by a salted hash, names are dropped and message content is reduced to
+its length, so recordings can be shared without leaking user data.
+
+File format (gzip-compressed NDJSON):
+    {"format": "grebbot-gateway", "version": 1, "recorded_at": "..."}
+    {"t": 12, "e": "PRESENCE_UPDATE", "g": 81723, "u": 99812, "s": "online", "a": ["Sea of Thieves"]}
+    ...
+``t`` is the offset in milliseconds from the start of the recording.
+
+The listener only queues the raw frame with its arrival time; decoding,
+anonymizing and compressing happen on a writer thread, so recording adds no
+JSON parsing to the event loop on top of discord.py's own.
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "grebbot-gateway"
+FORMAT_VERSION = 1
+
+RECORDED_EVENTS = {
+    "PRESENCE_UPDATE",
+    "GUILD_MEMBER_ADD",
+    "GUILD_MEMBER_REMOVE",
+    "GUILD_MEMBER_UPDATE",
+    "MESSAGE_CREATE",
+}
+
+# Activity type 4 is a custom status whose text is written by the user
+CUSTOM_STATUS_TYPE = 4
+
+
+class GatewayRecorder:
+    """Anonymizes and appends gateway dispatches to a gzip NDJSON file"""
+
+    def __init__(self, path: str, salt: Optional[bytes] = None, flush_every: int = 500,
+                 max_backlog: int = 50_000):
+        self.path = path
+        self._salt = salt or os.urandom(16)
+        self._flush_every = flush_every
+        self._start = time.monotonic()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self.recorded = 0
+        self.dropped = 0  # frames that arrived while the writer was max_backlog behind
+        self._write({
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        })
+        # (arrival time, raw frame), or None to stop
+        self._queue: queue.Queue = queue.Queue(maxsize=max_backlog)
+        self._thread = threading.Thread(target=self._run, name="gateway-recorder", daemon=True)
+        self._thread.start()
+
+    def _anon(self, snowflake: Any) -> Optional[int]:
+        """Stable, non-reversible replacement for a Discord ID within this recording"""
+        if snowflake is None:
+            return None
+        digest = hmac.new(self._salt, str(snowflake).encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:6], "big")
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def _convert(self, event: str, data: Dict, received_at: float) -> Dict:
+        record: Dict[str, Any] = {
+            "t": int((received_at - self._start) * 1000),
+            "e": event,
+            "g": self._anon(data.get("guild_id")),
+        }
+        if event == "PRESENCE_UPDATE":
+            record["u"] = self._anon((data.get("user") or {}).get("id"))
+            record["s"] = data.get("status")
+            record["a"] = [
+                "Custom Status" if activity.get("type") == CUSTOM_STATUS_TYPE else activity.get("name")
+                for activity in data.get("activities") or []
+            ]
+        elif event == "MESSAGE_CREATE":
+            author = data.get("author") or {}
+            content = data.get("content") or ""
+            record["u"] = self._anon(author.get("id"))
+            record["c"] = self._anon(data.get("channel_id"))
+            record["b"] = bool(author.get("bot"))
+            record["n"] = len(content)
+            # Keep only the first character so command-vs-chat traffic shapes survive
+            record["p"] = content[:1] if content[:1] in ("!", "$") else ""
+        else:
+            record["u"] = self._anon((data.get("user") or {}).get("id"))
+        return record
+
+    def record_raw(self, raw: Any, received_at: Optional[float] = None):
+        """Record one raw gateway message (str or already-decoded dict); runs on the writer thread"""
+        payload = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        event = payload.get("t")
+        if event not in RECORDED_EVENTS:
+            return
+        self._write(self._convert(event, payload.get("d") or {}, received_at or time.monotonic()))
+        self.recorded += 1
+        if self.recorded % self._flush_every == 0:
+            self._file.flush()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            received_at, raw = item
+            try:
+                self.record_raw(raw, received_at)
+            except Exception as e:
+                logger.error(f"Error recording gateway event: {e}")
+
+    async def on_socket_raw_receive(self, msg):
+        """Listener for ``on_socket_raw_receive`` (requires ``enable_debug_events=True``)"""
+        try:
+            self._queue.put_nowait((time.monotonic(), msg))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write what is still queued and close the file"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+        if not self._file.closed:
+            self._file.close()
+        if self.dropped:
+            logger.warning(f"Gateway recording dropped {self.dropped} frame(s) the writer couldn't keep up with")
+
+
+def read_recording(path: str):
+    """Yield recorded events, tolerating a recording cut off by a crash"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+            if header.get("format") != FORMAT_NAME:
+                raise ValueError(f"{path} is not a GrebBot gateway recording")
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, json.JSONDecodeError):
+            return
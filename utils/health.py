@@ -0,0 +1,101 @@
+"""Cached health record behind ``/healthz`` and ``/readyz``.
+
+A task on the bot loop refreshes one record every ``interval`` seconds from
+values other components already keep: gateway latency and READY state from
+discord.py, loop lag from the watchdog, the last Mongo ping from
+``MongoHealthMonitor`` and the log queue backlog. The endpoints only read the
+record, so a probe never touches Discord or the database.
+
+Because the refresh runs on the bot loop, a record that stops updating means
+the loop itself is stuck, which is what liveness reports.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from utils.logging_setup import queue_stats
+from utils.loop_watchdog import watchdog as loop_watchdog
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProbe:
+    def __init__(self, interval: float = 5.0, max_latency: float = 5.0, max_loop_lag: float = 1.0,
+                 max_log_backlog: int = 5000):
+        self.interval = interval
+        self.max_latency = max_latency
+        self.max_loop_lag = max_loop_lag
+        self.max_log_backlog = max_log_backlog
+        self.record: Dict = {"updated_at": None, "ready": False, "checks": {}}
+        self.created = time.time()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot):
+        """Start refreshing on the running loop (call from inside it)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, bot):
+        while True:
+            try:
+                self.refresh(bot)
+            except Exception as e:
+                logger.exception(f"Health probe failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def refresh(self, bot):
+        latency = bot.latency
+        latency_ms = None if math.isinf(latency) or math.isnan(latency) else round(latency * 1000, 1)
+        backlog = queue_stats()["backlog"]
+        checks = {
+            "gateway": {"ok": bot.is_ready() and not bot.is_closed() and latency_ms is not None
+                              and latency_ms <= self.max_latency * 1000,
+                        "ready": bot.is_ready(), "latency_ms": latency_ms},
+            "event_loop": {"ok": loop_watchdog.last_lag <= self.max_loop_lag,
+                           "lag_ms": round(loop_watchdog.last_lag * 1000, 1)},
+            "log_queue": {"ok": backlog <= self.max_log_backlog, "backlog": backlog},
+        }
+
+        subscription_manager = bot.get_cog('SubscriptionManager')
+        if subscription_manager is not None:
+            monitor = subscription_manager.mongo_health
+            # While Mongo is down subscriptions are served from the local store, so only
+            # an outage without that fallback makes the bot unready
+            fallback = subscription_manager.local_store is not None
+            checks["mongodb"] = {"ok": monitor.healthy is not False or fallback, "healthy": monitor.healthy,
+                                 "ping_ms": monitor.last_ping_ms, "breaker": subscription_manager.mongo_breaker.state,
+                                 "local_fallback": fallback}
+
+        # Swapped in whole so the web thread never sees a half-built record
+        self.record = {
+            "updated_at": time.time(),
+            "ready": all(check["ok"] for check in checks.values()),
+            "checks": checks,
+        }
+
+    def liveness(self) -> Dict:
+        """Alive as long as the loop keeps refreshing the record"""
+        updated_at = self.record["updated_at"]
+        # Until the first refresh, measured from startup
+        age = time.time() - (updated_at or self.created)
+        return {"alive": age <= self.interval * 3 + self.max_loop_lag, "age_seconds": round(age, 1)}
+
+    def readiness(self) -> Dict:
+        record, liveness = self.record, self.liveness()
+        return {**record, **liveness, "ready": record["ready"] and liveness["alive"]}
+
+
+# Started from main.py on the bot's loop, read by /healthz and /readyz
+health_probe = HealthProbe(
+    interval=float(os.getenv('HEALTH_PROBE_INTERVAL', '5')),
+    max_latency=float(os.getenv('HEALTH_MAX_LATENCY', '5')),
+    max_loop_lag=float(os.getenv('HEALTH_MAX_LOOP_LAG', '1')),
+)
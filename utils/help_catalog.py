@@ -0,0 +1,73 @@
+"""Command catalog behind the help embed and ``/api/bot/commands``.
+
+Built from ``bot.commands`` the first time it is needed and cached, so help
+text never has to be maintained by hand. The command set only changes when an
+extension is (re)loaded, which is the only time the cache is invalidated.
+"""
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "Command: !say <message> - Makes the bot say something"
+_COMMAND_LINE = re.compile(r"^Command:\s*!?(?P<usage>.+?)\s+-\s+(?P<description>.+)$")
+_CAMEL_CASE = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+class CommandInfo(NamedTuple):
+    name: str
+    usage: str  # without the prefix, e.g. "leaderboard [hours|sessions|streak]"
+    description: str
+    category: str
+    checks: Tuple[str, ...]  # e.g. ("has_permissions", "guild_only")
+
+    @property
+    def admin_only(self) -> bool:
+        return "has_permissions" in self.checks
+
+
+def describe(command) -> CommandInfo:
+    """Summary line and usage from a command's docstring, falling back to its signature"""
+    usage = f"{command.qualified_name} {command.signature}".strip()
+    description = ""
+    for line in (command.help or "").splitlines():
+        line = line.strip()
+        match = _COMMAND_LINE.match(line)
+        if match:
+            usage, description = match.group("usage"), match.group("description")
+        elif line.lower().startswith("usage:"):
+            usage = line[len("usage:"):].strip().lstrip("!")
+        elif line and not description:
+            description = line
+    category = _CAMEL_CASE.sub(" ", command.cog.qualified_name) if command.cog else "Other"
+    checks = tuple(check.__qualname__.split(".")[0] for check in command.checks)
+    return CommandInfo(command.name, usage, description or "No description available", category, checks)
+
+
+class HelpCatalog:
+    def __init__(self):
+        self._commands: Optional[List[CommandInfo]] = None
+
+    def commands(self, bot) -> List[CommandInfo]:
+        """Visible commands sorted by category and name, built on first use"""
+        catalog = self._commands
+        if catalog is None:
+            catalog = sorted((describe(command) for command in list(bot.commands) if not command.hidden),
+                             key=lambda info: (info.category, info.name))
+            self._commands = catalog
+            logger.debug(f"Built help catalog with {len(catalog)} command(s)")
+        return catalog
+
+    def by_category(self, bot) -> Dict[str, List[CommandInfo]]:
+        grouped: Dict[str, List[CommandInfo]] = {}
+        for info in self.commands(bot):
+            grouped.setdefault(info.category, []).append(info)
+        return grouped
+
+    def invalidate(self):
+        self._commands = None
+
+
+# Shared by the help command and the web interface
+help_catalog = HelpCatalog()
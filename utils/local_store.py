@@ -0,0 +1,161 @@
+"""Local SQLite mirror of the subscription collections.
+
+Keeps ``sea_of_thieves_subscriptions`` and ``dm_subscriptions`` on local disk so
+the bot can warm its caches at startup without a network round trip and keep
+notifying while MongoDB is unavailable. Writes land here as well as in MongoDB
+(write-through); rows whose MongoDB write failed are flagged ``dirty`` and are
+pushed back by the reconcile pass once MongoDB is reachable again.
+
+Calls are synchronous and guarded by a lock, so bulk operations can run in a
+worker thread with ``asyncio.to_thread``.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    guild_id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dm_subscriptions (
+    user_id INTEGER NOT NULL,
+    guild_id TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, guild_id)
+);
+CREATE INDEX IF NOT EXISTS dm_subscriptions_guild ON dm_subscriptions (guild_id, enabled);
+"""
+
+
+def _encode(doc: Dict) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, default=str)
+
+
+class LocalSubscriptionStore:
+    """Embedded mirror of the subscription collections"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Subscriptions
+
+    def get_subscription(self, guild_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT doc FROM subscriptions WHERE guild_id = ?", (guild_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_subscription(self, guild_id: str, fields: Dict, dirty: bool = False,
+                          unset: Iterable[str] = ()) -> Dict:
+        """Merge ``fields`` into the stored document (like ``$set``/``$unset``) and return it"""
+        with self._lock:
+            row = self._conn.execute("SELECT doc FROM subscriptions WHERE guild_id = ?", (guild_id,)).fetchone()
+            doc = json.loads(row[0]) if row else {"guild_id": guild_id}
+            doc.update({k: v for k, v in fields.items() if k != "_id"})
+            for key in unset:
+                doc.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO subscriptions (guild_id, doc, enabled, dirty) VALUES (?, ?, ?, ?)",
+                (guild_id, _encode(doc), int(bool(doc.get("enabled", False))), int(dirty))
+            )
+        return doc
+
+    def enabled_subscriptions(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT guild_id, doc FROM subscriptions WHERE enabled = 1").fetchall()
+        return {guild_id: json.loads(doc) for guild_id, doc in rows}
+
+    def dirty_subscriptions(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT doc FROM subscriptions WHERE dirty = 1").fetchall()
+        return [json.loads(doc) for doc, in rows]
+
+    def replace_subscriptions(self, docs: Iterable[Dict]):
+        """Refresh from MongoDB, keeping rows that still have unsynced local changes"""
+        rows = [(doc["guild_id"], _encode(doc), int(bool(doc.get("enabled", False)))) for doc in docs]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM subscriptions WHERE dirty = 0")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO subscriptions (guild_id, doc, enabled, dirty) VALUES (?, ?, ?, 0)", rows
+            )
+            self._conn.execute("COMMIT")
+
+    # DM subscriptions
+
+    def save_dm_subscription(self, user_id: int, guild_id: str, enabled: bool, dirty: bool = False):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dm_subscriptions (user_id, guild_id, enabled, dirty) VALUES (?, ?, ?, ?)",
+                (user_id, guild_id, int(enabled), int(dirty))
+            )
+
+    def save_dm_subscriptions(self, rows: Iterable[Tuple[int, str, bool]]):
+        """Upsert a batch of clean (user_id, guild_id, enabled) rows from MongoDB; unsynced local rows win"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO dm_subscriptions (user_id, guild_id, enabled, dirty) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT (user_id, guild_id) DO UPDATE SET enabled = excluded.enabled WHERE dirty = 0",
+                [(user_id, guild_id, int(enabled)) for user_id, guild_id, enabled in rows]
+            )
+            self._conn.execute("COMMIT")
+
+    def enabled_dm_subscriptions(self) -> List[Tuple[int, str]]:
+        """Every enabled (user_id, guild_id) pair"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user_id, guild_id FROM dm_subscriptions WHERE enabled = 1"
+            ).fetchall()
+
+    def dirty_dm_subscriptions(self) -> List[Tuple[int, str, bool]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, guild_id, enabled FROM dm_subscriptions WHERE dirty = 1"
+            ).fetchall()
+        return [(user_id, guild_id, bool(enabled)) for user_id, guild_id, enabled in rows]
+
+    # Reconcile bookkeeping
+
+    def mark_subscriptions_clean(self, guild_ids: Iterable[str]):
+        with self._lock:
+            self._conn.executemany("UPDATE subscriptions SET dirty = 0 WHERE guild_id = ?",
+                                   [(guild_id,) for guild_id in guild_ids])
+
+    def mark_dm_subscriptions_clean(self, keys: Iterable[Tuple[int, str]]):
+        with self._lock:
+            self._conn.executemany("UPDATE dm_subscriptions SET dirty = 0 WHERE user_id = ? AND guild_id = ?",
+                                   list(keys))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscriptions, dirty_subscriptions = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(dirty), 0) FROM subscriptions").fetchone()
+            dm_subscriptions, dirty_dm = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(dirty), 0) FROM dm_subscriptions").fetchone()
+        return {
+            "path": self.path,
+            "subscriptions": subscriptions,
+            "dm_subscriptions": dm_subscriptions,
+            "unsynced": dirty_subscriptions + dirty_dm,
+        }
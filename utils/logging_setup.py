@@ -0,0 +1,190 @@
+"""Structured, non-blocking logging for the bot.
+
+Every logger writes into a bounded in-memory queue through a ``QueueHandler``;
+a ``QueueListener`` thread does the actual formatting and I/O (stdout and the
+web interface), so logging never blocks the gateway event loop.
+
+Configuration (environment variables):
+    LOG_LEVEL         Root level (default INFO, DEBUG when DEBUG_MODE is on)
+    LOG_LEVELS        Per-module levels, e.g. "cogs.presenceChanges=DEBUG,discord=WARNING"
+    LOG_FORMAT        "json" (default) or "text"
+    LOG_SAMPLE_RATES  Sampling for high-volume events, e.g. "message=0.01,presence=0.1"
+    LOG_WEB_LEVEL     Minimum level forwarded to the web interface (default INFO)
+
+High-volume call sites opt into sampling with ``extra={"sample": "<key>"}``.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_LEVELS = "discord=INFO"
+
+# Attributes every LogRecord has; anything else came from ``extra=`` and is structured data
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_web_handler: Optional["WebInterfaceHandler"] = None
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, val = item.partition("=")
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with any ``extra=`` fields included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every N records for each sampled key; unsampled records always pass"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self._every = {key: max(1, round(1 / rate)) for key, rate in rates.items() if rate > 0}
+        self._disabled = {key for key, rate in rates.items() if rate <= 0}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key is None:
+            return True
+        if key in self._disabled:
+            return False
+        every = self._every.get(key)
+        if every is None or every == 1:
+            return True
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % every:
+            return False
+        record.sampled_every = every
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here; the listener thread only formats the envelope
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    @property
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+
+class WebInterfaceHandler(logging.Handler):
+    """Forwards records to ``BotWebInterface.add_log`` once a sink is attached"""
+
+    def __init__(self, level=logging.INFO):
+        super().__init__(level)
+        self.sink: Optional[Callable[[str, str], None]] = None
+
+    def emit(self, record: logging.LogRecord):
+        sink = self.sink
+        if sink is None:
+            return
+        try:
+            sink(record.getMessage(), record.levelname)
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging(debug: bool = False):
+    """Install the queue-based logging pipeline on the root logger (idempotent)"""
+    global _listener, _queue_handler, _web_handler
+    if _listener is not None:
+        return
+
+    root_level = os.getenv("LOG_LEVEL", "DEBUG" if debug else "INFO").upper()
+    levels = _parse_mapping(DEFAULT_LEVELS)
+    levels.update(_parse_mapping(os.getenv("LOG_LEVELS", "")))
+    sample_rates = {key: float(rate) for key, rate in _parse_mapping(os.getenv("LOG_SAMPLE_RATES", "message=0.01")).items()}
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    _web_handler = WebInterfaceHandler(os.getenv("LOG_WEB_LEVEL", "INFO").upper())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(root_level)
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, _web_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def set_web_sink(sink: Optional[Callable[[str, str], None]]):
+    """Attach the web interface (``add_log(message, level)``) as a log sink"""
+    if _web_handler is not None:
+        _web_handler.sink = sink
+
+
+def queue_stats() -> Dict[str, int]:
+    """Backlog and drop counters for the log queue"""
+    if _queue_handler is None:
+        return {"backlog": 0, "dropped": 0}
+    return {"backlog": _queue_handler.backlog, "dropped": _queue_handler.dropped}
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
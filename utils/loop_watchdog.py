@@ -0,0 +1,139 @@
+"""Event-loop lag watchdog.
+
+A ticker coroutine sleeps for ``interval`` and measures how late it wakes up;
+that delay is the loop's scheduling lag, i.e. how long every other callback
+(gateway heartbeats included) was kept waiting. Lags are kept in a histogram.
+
+Measuring after the fact can't say *what* blocked the loop, so a helper thread
+watches the ticker's heartbeat: once it is overdue by more than ``threshold``
+the thread grabs the loop thread's stack with ``sys._current_frames()`` while
+the blocking code is still running. Captured stacks are grouped by signature
+so repeat offenders show up with a count.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; the last bucket catches everything above
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LoopWatchdog:
+    """Measures loop lag continuously and captures the loop thread's stack during stalls"""
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.1, max_stalls: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.ticks = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stall_count = 0
+        # Recent stalls, newest last: {time, lag_ms, stack}
+        self.stalls: deque = deque(maxlen=max_stalls)
+        # Captured stacks grouped by signature: {signature: {count, max_lag_ms, last_seen, stack}}
+        self.offenders: Dict[str, Dict] = {}
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._captured: Optional[List[str]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start on the running loop (call from inside it)"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._record(max(0.0, now - expected))
+
+    def _record(self, lag: float):
+        lag_ms = lag * 1000
+        self.ticks += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+        captured, self._captured = self._captured, None
+        if lag < self.threshold:
+            return
+        self.stall_count += 1
+        stack = captured or []
+        self.stalls.append({"time": time.time(), "lag_ms": round(lag_ms, 1), "stack": stack})
+        if stack:
+            signature = "|".join(stack[-3:])
+            offender = self.offenders.setdefault(signature, {"count": 0, "max_lag_ms": 0.0, "stack": stack})
+            offender["count"] += 1
+            offender["max_lag_ms"] = round(max(offender["max_lag_ms"], lag_ms), 1)
+            offender["last_seen"] = time.time()
+        where = stack[-1] if stack else "unknown (not caught in time)"
+        logger.warning(f"⏱️ Event loop blocked for {lag_ms:.0f}ms at {where}")
+
+    def _watch(self):
+        """Helper thread: snapshot the loop thread's stack while a stall is in progress"""
+        poll = max(self.threshold / 2, 0.01)
+        while not self._stop.wait(poll):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._captured = [
+                f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}"
+                for entry in traceback.extract_stack(frame)
+            ]
+
+    def stats(self, top: int = 10) -> Dict:
+        buckets = [f"<={bound}ms" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        offenders = sorted(self.offenders.values(), key=lambda o: o["count"], reverse=True)[:top]
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "ticks": self.ticks,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stall_count,
+            "histogram": dict(zip(buckets, self.histogram)),
+            "recent_stalls": list(self.stalls)[-10:],
+            "offenders": offenders,
+        }
+
+
+# Started from main.py on the bot's loop
+watchdog = LoopWatchdog(
+    interval=float(os.getenv('LOOP_WATCHDOG_INTERVAL', '0.25')),
+    threshold=float(os.getenv('LOOP_LAG_THRESHOLD', '0.1')),
+)
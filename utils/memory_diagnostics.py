@@ -0,0 +1,137 @@
+"""Heap snapshots and allocation diffs for hunting memory growth.
+
+Built on ``tracemalloc`` (where memory was allocated, by file and line) and
+``gc`` (how many live objects of each type exist). Tracing is only switched on
+when asked for, since it slows allocations down, and snapshots are kept by
+name so two points in time can be compared:
+
+    start → snapshot "before" → ...wait... → snapshot "after" → diff before after
+"""
+import gc
+import logging
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_SNAPSHOTS = 5
+# Types reported even when they are not among the most common
+WATCHED_TYPES = ("Member", "User", "Embed", "Message", "dict", "list", "PlayerStats", "PendingDigest")
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def count_objects() -> Counter:
+    """Live objects tracked by the garbage collector, by type name"""
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+class MemorySnapshot:
+    __slots__ = ("name", "taken_at", "snapshot", "type_counts", "traced")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.taken_at = time.time()
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        self.type_counts = count_objects()
+        self.traced = tracemalloc.get_traced_memory()[0]
+
+    def summary(self) -> Dict:
+        return {"name": self.name, "taken_at": self.taken_at, "traced_mb": round(self.traced / 2**20, 2),
+                "objects": sum(self.type_counts.values())}
+
+
+class MemoryDiagnostics:
+    """Named tracemalloc snapshots, diffs between them and live object counts"""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self.snapshots: "OrderedDict[str, MemorySnapshot]" = OrderedDict()
+        self._taken = 0  # numbers unnamed snapshots; keeps counting after old ones are dropped
+        # The bot loop and the web thread can both drive this
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info("🧠 Started tracing allocations")
+
+    def stop(self):
+        with self._lock:
+            self.snapshots.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+                logger.info("🧠 Stopped tracing allocations")
+
+    def snapshot(self, name: Optional[str] = None) -> Dict:
+        """Take a named snapshot (starts tracing first if needed); the oldest is dropped beyond MAX_SNAPSHOTS"""
+        with self._lock:
+            self.start()
+            self._taken += 1
+            name = name or f"s{self._taken}"
+            self.snapshots.pop(name, None)
+            snapshot = self.snapshots[name] = MemorySnapshot(name)
+            while len(self.snapshots) > MAX_SNAPSHOTS:
+                self.snapshots.popitem(last=False)
+        return snapshot.summary()
+
+    def diff(self, before: str, after: str, group_by: str = "lineno", top: int = 15) -> Dict:
+        """Top allocation growth between two snapshots by file and line (or ``filename``), plus type growth"""
+        with self._lock:
+            missing = [name for name in (before, after) if name not in self.snapshots]
+            if missing:
+                raise KeyError(f"Unknown snapshot(s): {', '.join(missing)}")
+            old, new = self.snapshots[before], self.snapshots[after]
+
+        stats = new.snapshot.compare_to(old.snapshot, group_by)
+        allocations = [
+            {"where": str(stat.traceback[0]) if stat.traceback else "?",
+             "size_diff_kb": round(stat.size_diff / 1024, 1), "size_kb": round(stat.size / 1024, 1),
+             "count_diff": stat.count_diff}
+            for stat in stats[:top]
+        ]
+
+        type_growth = new.type_counts.copy()
+        type_growth.subtract(old.type_counts)
+        return {
+            "before": old.summary(),
+            "after": new.summary(),
+            "traced_diff_mb": round((new.traced - old.traced) / 2**20, 2),
+            "allocations": allocations,
+            "type_growth": [{"type": name, "diff": diff, "count": new.type_counts[name]}
+                            for name, diff in type_growth.most_common(top) if diff > 0],
+        }
+
+    def object_counts(self, top: int = 20) -> Dict[str, int]:
+        counts = count_objects()
+        result = dict(counts.most_common(top))
+        for name in WATCHED_TYPES:
+            result.setdefault(name, counts.get(name, 0))
+        return result
+
+    def status(self) -> Dict:
+        traced, peak = tracemalloc.get_traced_memory() if self.tracing else (0, 0)
+        return {
+            "tracing": self.tracing,
+            "traced_mb": round(traced / 2**20, 2),
+            "peak_mb": round(peak / 2**20, 2),
+            "gc_counts": gc.get_count(),
+            "gc_stats": gc.get_stats(),
+            "snapshots": [snapshot.summary() for snapshot in list(self.snapshots.values())],
+        }
+
+
+# Shared by the !memdiag command and the web interface
+memory_diagnostics = MemoryDiagnostics()
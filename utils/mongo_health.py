@@ -0,0 +1,182 @@
+"""MongoDB client tuning, circuit breaker and health monitor.
+
+With Motor's defaults every query against an unreachable server waits out the
+30 s server-selection timeout, which stalls presence handling for that long.
+The client is built with short, configurable timeouts instead, and calls go
+through a ``CircuitBreaker``: after a few connection failures it opens and
+short-circuits every DB call (callers fall back to cached data) until the
+``MongoHealthMonitor``'s periodic ping sees the server again.
+
+Configuration (environment):
+
+- ``MONGODB_DATABASE`` - database name (default ``grebbot_db_test`` in DEBUG_MODE, else ``grebbot_db``)
+- ``MONGODB_MAX_POOL_SIZE`` / ``MONGODB_MIN_POOL_SIZE`` - connection pool bounds
+- ``MONGODB_SERVER_SELECTION_TIMEOUT_MS`` / ``MONGODB_CONNECT_TIMEOUT_MS`` / ``MONGODB_SOCKET_TIMEOUT_MS``
+- ``MONGODB_BREAKER_THRESHOLD`` - consecutive failures before the breaker opens
+- ``MONGODB_BREAKER_RESET`` - seconds before an open breaker lets a trial call through
+- ``MONGODB_HEALTH_INTERVAL`` - seconds between health pings
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from pymongo.errors import ConnectionFailure
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def mongo_client_options() -> Dict[str, int]:
+    """Keyword arguments for AsyncIOMotorClient"""
+    return {
+        "maxPoolSize": int(os.getenv('MONGODB_MAX_POOL_SIZE', '50')),
+        "minPoolSize": int(os.getenv('MONGODB_MIN_POOL_SIZE', '0')),
+        "serverSelectionTimeoutMS": int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '3000')),
+        "connectTimeoutMS": int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '3000')),
+        "socketTimeoutMS": int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '5000')),
+    }
+
+
+def mongo_database_name(debug: bool) -> str:
+    """Explicit MONGODB_DATABASE, otherwise the test database in debug mode and production otherwise"""
+    return os.getenv('MONGODB_DATABASE') or ('grebbot_db_test' if debug else 'grebbot_db')
+
+
+class CircuitOpen(Exception):
+    """The database is marked unavailable; the call was not attempted"""
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures → half-open after ``reset_timeout``"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 failure_types: Tuple[Type[BaseException], ...] = (ConnectionFailure,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self._state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self.last_error: Optional[str] = None
+        # Recent state changes for the web interface: {time, from, to, reason}
+        self.transitions: deque = deque(maxlen=20)
+        # Called with (previous_state, new_state) on every transition
+        self.listeners: List[Callable[[str, str], None]] = []
+
+    @property
+    def state(self) -> str:
+        # A pure read: the web thread calls this through stats(), so transitions only happen in allow()
+        return self._state
+
+    def _transition(self, state: str, reason: str):
+        previous, self._state = self._state, state
+        self.transitions.append({"time": time.time(), "from": previous, "to": state, "reason": reason})
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            logger.warning(f"🔌 {self.name} circuit open: {reason}")
+        elif state == CLOSED:
+            logger.info(f"🔌 {self.name} circuit closed: {reason}")
+        else:
+            logger.info(f"🔌 {self.name} circuit half-open: {reason}")
+        for listener in self.listeners:
+            listener(previous, state)
+
+    def allow(self) -> bool:
+        """Whether a call may go through (half-open lets calls through as trials); runs on the bot loop"""
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN, "reset timeout elapsed")
+        return self._state != OPEN
+
+    def record_success(self):
+        self.failures = 0
+        if self._state != CLOSED:
+            self._transition(CLOSED, "call succeeded")
+
+    def record_failure(self, error: BaseException):
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self._state == HALF_OPEN:
+            self._transition(OPEN, f"trial call failed ({type(error).__name__})")
+        elif self._state == CLOSED and self.failures >= self.failure_threshold:
+            self._transition(OPEN, f"{self.failures} consecutive failures ({type(error).__name__})")
+
+    async def call(self, func, *args, **kwargs):
+        """Await ``func(*args, **kwargs)`` unless the circuit is open (raises CircuitOpen)"""
+        if not self.allow():
+            self.short_circuited += 1
+            raise CircuitOpen(f"{self.name} unavailable")
+        try:
+            result = await func(*args, **kwargs)
+        except self.failure_types as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "last_error": self.last_error,
+            "transitions": list(self.transitions),
+        }
+
+
+class MongoHealthMonitor:
+    """Pings the server periodically; the result drives the breaker, so it recovers without traffic"""
+
+    def __init__(self, client, breaker: CircuitBreaker, interval: float = 15.0):
+        self.client = client
+        self.breaker = breaker
+        self.interval = interval
+        self.healthy: Optional[bool] = None
+        self.last_ping_ms: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def ping(self) -> bool:
+        t0 = time.perf_counter()
+        try:
+            await self.client.admin.command('ping')
+        except Exception as e:
+            self.healthy = False
+            self.last_ping_ms = None
+            self.breaker.record_failure(e)
+        else:
+            self.healthy = True
+            self.last_ping_ms = round((time.perf_counter() - t0) * 1000, 2)
+            self.breaker.record_success()
+        self.last_checked = time.time()
+        return self.healthy
+
+    async def _run(self):
+        while True:
+            await self.ping()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict:
+        return {
+            "healthy": self.healthy,
+            "last_ping_ms": self.last_ping_ms,
+            "last_checked": self.last_checked,
+            "interval": self.interval,
+            "breaker": self.breaker.stats(),
+        }
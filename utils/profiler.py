@@ -0,0 +1,155 @@
+"""Low-overhead sampling profiler for live instances.
+
+A background thread snapshots every thread's Python stack with
+``sys._current_frames()`` at a fixed interval, so the bot loop, the web
+interface and helper threads are all covered without instrumenting any code.
+Stacks are aggregated in collapsed ("folded") form, one line per unique stack:
+
+    MainThread;run (main.py:170);run_forever (base_events.py:593);... 42
+
+which ``flamegraph.pl`` or speedscope turn into a flame graph directly.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = 'data/profiles'
+MAX_DURATION = 300  # seconds
+
+
+def profile_dir() -> str:
+    # Read when used rather than at import, which happens before main.py loads .env
+    return os.getenv('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks for a fixed duration; one run at a time"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self.path: Optional[str] = None
+        self.last_result: Optional[Dict] = None
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self._done.set()
+
+    @property
+    def running(self) -> bool:
+        return not self._done.is_set()
+
+    def start(self, duration: float) -> bool:
+        """Start sampling for ``duration`` seconds in the background; False if a run is in progress"""
+        if self.running:
+            return False
+        self.stacks = Counter()
+        self.samples = 0
+        self.path = None
+        # Cleared so a failed run never hands out the previous run's result
+        self.last_result = None
+        self.duration = min(max(duration, 0.1), MAX_DURATION)
+        self.started_at = time.time()
+        self._done.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"🔬 Profiling for {self.duration:.0f}s")
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        try:
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stack: List[str] = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(ident, f"thread-{ident}"))
+                    self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+                time.sleep(self.interval)
+            self.last_result = self._finish()
+        except Exception as e:
+            logger.exception(f"Profiler failed: {e}")
+        finally:
+            self._done.set()
+
+    def _finish(self) -> Dict:
+        self.path = self.write_collapsed()
+        result = self.summary()
+        logger.info(f"🔬 Profile finished: {self.samples} samples written to {self.path}")
+        return result
+
+    def write_collapsed(self, path: Optional[str] = None) -> str:
+        if path is None:
+            directory = profile_dir()
+            os.makedirs(directory, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+            path = os.path.join(directory, f"profile-{stamp}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def summary(self, top: int = 15) -> Dict:
+        """Hottest functions by self time (leaf frames) and by inclusive time, per thread"""
+        leaf: Counter = Counter()
+        inclusive: Counter = Counter()
+        threads: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            threads[frames[0]] += count
+            leaf[(frames[0], frames[-1])] += count
+            for label in set(frames[1:]):
+                inclusive[(frames[0], label)] += count
+
+        def ranked(counter: Counter) -> List[Dict]:
+            # Percentages are of the thread's own samples
+            return [{"thread": thread, "function": label, "samples": n,
+                     "percent": round(100 * n / threads[thread], 1)}
+                    for (thread, label), n in counter.most_common(top)]
+
+        return {
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "samples": self.samples,
+            "interval": self.interval,
+            "path": self.path,
+            "threads": dict(threads),
+            "top_self": ranked(leaf),
+            "top_inclusive": ranked(inclusive),
+        }
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "samples": self.samples,
+            "last_result": self.last_result,
+        }
+
+
+# Shared by the !profile command and the web interface
+profiler = SamplingProfiler()
@@ -0,0 +1,168 @@
+"""Telemetry for discord.py's HTTP layer and its rate limits.
+
+``install(bot.http)`` wraps ``HTTPClient.request`` to count requests, errors and
+wall time per route, and a filter on the ``discord.http`` logger picks up the
+429 warnings discord.py emits (with the retry-after it is about to sleep). The
+route of the request that hit the 429 is carried in a context variable, so both
+sources are attributed to the same route.
+
+discord.py retries 429s inside ``request``, so the warnings are the only place
+they show up. The logger is therefore kept at WARNING or below even when
+``LOG_LEVELS`` asks for less, and the filter drops what the configured level
+would have suppressed after counting it.
+
+Remaining quota comes from discord.py's own bucket objects (``HTTPClient._buckets``).
+Those are private, so the snapshot is best-effort and degrades to empty if they change.
+"""
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_route: contextvars.ContextVar = contextvars.ContextVar("grebbot_http_route", default=None)
+
+
+class RouteStats:
+    __slots__ = ("requests", "errors", "rate_limited", "slept", "total_time", "max_time", "last_status")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.slept = 0.0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_status: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "slept_seconds": round(self.slept, 3),
+            "avg_ms": round(self.total_time / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_ms": round(self.max_time * 1000, 2),
+            "last_status": self.last_status,
+        }
+
+
+class _RateLimitLogFilter(logging.Filter):
+    """Turns discord.py's 429 warnings into counters; passes only records at ``passthrough_level`` or above"""
+
+    def __init__(self, telemetry: "RateLimitTelemetry", passthrough_level: int):
+        super().__init__()
+        self.telemetry = telemetry
+        self.passthrough_level = passthrough_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = str(record.msg)
+        if message.startswith("We are being rate limited") and "Retrying in" in message:
+            retry_after = record.args[-1] if record.args else 0.0
+            self.telemetry.record_429(float(retry_after))
+        elif message.startswith("Global rate limit has been hit"):
+            self.telemetry.global_rate_limits += 1
+        return record.levelno >= self.passthrough_level
+
+
+class RateLimitTelemetry:
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = {}
+        self.global_rate_limits = 0
+        self.started = time.time()
+        self._http = None
+        self._lock = threading.Lock()
+
+    def install(self, http):
+        """Wrap ``http.request`` and listen for rate-limit warnings (idempotent)"""
+        if self._http is http:
+            return
+        self._http = http
+        original = http.request
+
+        async def instrumented_request(route, **kwargs):
+            key = route.key
+            token = _current_route.set(key)
+            start = time.perf_counter()
+            status = None
+            try:
+                result = await original(route, **kwargs)
+                status = 200
+                return result
+            except Exception as e:
+                status = getattr(e, "status", None) or 0
+                raise
+            finally:
+                _current_route.reset(token)
+                self._record(key, time.perf_counter() - start, status)
+
+        http.request = instrumented_request
+        http_logger = logging.getLogger("discord.http")
+        configured = http_logger.getEffectiveLevel()
+        if configured > logging.WARNING:
+            http_logger.setLevel(logging.WARNING)
+        http_logger.addFilter(_RateLimitLogFilter(self, configured))
+
+    def _stats(self, key: str) -> RouteStats:
+        stats = self.routes.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.routes.setdefault(key, RouteStats())
+        return stats
+
+    def _record(self, key: str, elapsed: float, status: Optional[int]):
+        stats = self._stats(key)
+        stats.requests += 1
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        stats.last_status = status
+        if status == 0 or (status is not None and status >= 400):
+            stats.errors += 1
+
+    def record_429(self, retry_after: float):
+        stats = self._stats(_current_route.get() or "unknown")
+        stats.rate_limited += 1
+        stats.slept += retry_after
+
+    def buckets(self) -> List[Dict]:
+        """Current quota of discord.py's rate-limit buckets"""
+        if self._http is None:
+            return []
+        try:
+            items = list(getattr(self._http, "_buckets", {}).items())
+        except RuntimeError:  # mutated by the bot loop while copying
+            return []
+        buckets = []
+        for key, ratelimit in items:
+            buckets.append({
+                "bucket": key,
+                "limit": getattr(ratelimit, "limit", None),
+                "remaining": getattr(ratelimit, "remaining", None),
+                "reset_after": round(getattr(ratelimit, "reset_after", 0.0), 3),
+                "pending": len(getattr(ratelimit, "_pending_requests", ())),
+            })
+        return buckets
+
+    def snapshot(self, top: int = 20) -> Dict:
+        with self._lock:
+            routes = list(self.routes.items())
+        routes.sort(key=lambda item: item[1].requests, reverse=True)
+        buckets = sorted(self.buckets(), key=lambda b: (b["remaining"] is None, b["remaining"]))
+        return {
+            "since": self.started,
+            "totals": {
+                "requests": sum(stats.requests for _, stats in routes),
+                "errors": sum(stats.errors for _, stats in routes),
+                "rate_limited": sum(stats.rate_limited for _, stats in routes),
+                "global_rate_limited": self.global_rate_limits,
+                "slept_seconds": round(sum(stats.slept for _, stats in routes), 3),
+            },
+            "routes": [{"route": key, **stats.to_dict()} for key, stats in routes[:top]],
+            "buckets": buckets[:top],
+        }
+
+
+# Shared instance installed on the bot by main.py and read by the web interface
+telemetry = RateLimitTelemetry()
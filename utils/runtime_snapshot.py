@@ -0,0 +1,56 @@
+"""Runtime state written at shutdown and restored on the next boot.
+
+The snapshot is one gzip'd JSON document: every cog's ``export_state()`` (see
+``utils.cog_state``) plus the dashboard's log buffer. It is consumed when it is
+read, so a crash later on can't bring back state that is older than the
+database, and snapshots older than ``max_age`` are ignored.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: str, cogs: Dict[str, Dict], logs: Optional[list] = None) -> int:
+    """Write the snapshot atomically; returns its size in bytes"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "cogs": cogs, "logs": logs or []}
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(document, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def load_snapshot(path: str, max_age: float) -> Optional[Dict]:
+    """Read and remove the snapshot; None if there is none, it is unreadable or too old"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            document = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable state snapshot {path}: {e}")
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if document.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring state snapshot {path} with version {document.get('version')}")
+        return None
+    age = time.time() - document.get("saved_at", 0)
+    if age > max_age:
+        logger.warning(f"Ignoring state snapshot {path}: saved {age:.0f}s ago (limit {max_age:.0f}s)")
+        return None
+    return document
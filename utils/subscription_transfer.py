@@ -0,0 +1,173 @@
+"""Stream subscription collections to and from NDJSON, e.g. to move them between databases.
+
+Export walks each collection with a cursor and writes one line per document, and
+import replays the file through ``bulk_write`` batches of upserts keyed on each
+collection's natural key. Neither side holds more than one batch in memory, so
+millions of DM subscription rows move in constant memory.
+
+File format (NDJSON, gzip-compressed when the path ends in ``.gz``):
+    {"format": "grebbot-subscriptions", "version": 1, "database": "grebbot_db_test", "exported_at": "..."}
+    {"c": "sea_of_thieves_subscriptions", "d": {"guild_id": "123", ...}}
+    {"c": "dm_subscriptions", "d": {"user_id": 456, "guild_id": "123", "enabled": true, ...}}
+Documents are MongoDB extended JSON (dates and other BSON types round-trip); ``_id`` is not kept.
+
+Usage:
+    python -m utils.subscription_transfer export --database grebbot_db_test subscriptions.ndjson.gz
+    python -m utils.subscription_transfer import --database grebbot_db subscriptions.ndjson.gz
+    python -m utils.subscription_transfer import --database grebbot_db --dry-run subscriptions.ndjson.gz
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, IO, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+
+from utils.mongo_health import mongo_client_options
+
+FORMAT_NAME = "grebbot-subscriptions"
+FORMAT_VERSION = 1
+
+# Collection -> fields that identify a document (the upsert filter on import)
+COLLECTION_KEYS: Dict[str, Tuple[str, ...]] = {
+    "sea_of_thieves_subscriptions": ("guild_id",),
+    "dm_subscriptions": ("user_id", "guild_id"),
+    "guild_settings": ("guild_id",),
+    "auto_responders": ("guild_id", "trigger"),
+}
+DEFAULT_COLLECTIONS = ["sea_of_thieves_subscriptions", "dm_subscriptions"]
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Progress:
+    """Per-collection counts printed to stderr at most every ``interval`` seconds"""
+
+    def __init__(self, verb: str, interval: float = 2.0):
+        self.verb = verb
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._start = time.monotonic()
+        self._last = 0.0
+
+    def add(self, collection: str, n: int = 1):
+        self.counts[collection] = self.counts.get(collection, 0) + n
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = max(time.monotonic() - self._start, 1e-9)
+        total = sum(self.counts.values())
+        detail = ", ".join(f"{name}={count}" for name, count in self.counts.items())
+        prefix = "Done: " if final else ""
+        print(f"{prefix}{self.verb} {total} document(s) in {elapsed:.1f}s "
+              f"({total / elapsed:.0f}/s) [{detail}]", file=sys.stderr)
+
+
+async def export_collections(database: AsyncIOMotorDatabase, path: str,
+                             collections: Sequence[str] = DEFAULT_COLLECTIONS,
+                             batch_size: int = 1000) -> Dict[str, int]:
+    """Write every document of ``collections`` to ``path``; returns counts per collection"""
+    progress = Progress("Exported")
+    with _open(path, "w") as f:
+        f.write(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION, "database": database.name,
+                            "exported_at": datetime.now(timezone.utc).isoformat()}) + "\n")
+        for name in collections:
+            progress.counts.setdefault(name, 0)
+            async for doc in database[name].find({}, {"_id": 0}, batch_size=batch_size):
+                f.write(f'{{"c": {json.dumps(name)}, "d": {json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS)}}}\n')
+                progress.add(name)
+    progress.report(final=True)
+    return progress.counts
+
+
+async def import_collections(database: AsyncIOMotorDatabase, path: str,
+                             collections: Optional[Sequence[str]] = None,
+                             batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    """Upsert every document in ``path`` into ``database``; returns counts per collection"""
+    progress = Progress("Would import" if dry_run else "Imported")
+    batches: Dict[str, List[ReplaceOne]] = {}
+
+    async def flush(name: str):
+        ops = batches.pop(name, [])
+        if ops and not dry_run:
+            await database[name].bulk_write(ops, ordered=False)
+        progress.add(name, len(ops))
+
+    with _open(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != FORMAT_NAME or header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} v{FORMAT_VERSION} export")
+
+        for line_number, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            record = json_util.loads(line)
+            name = record["c"]
+            if collections is not None and name not in collections:
+                continue
+            keys = COLLECTION_KEYS.get(name)
+            if keys is None:
+                raise ValueError(f"line {line_number}: unknown collection {name!r}")
+            doc = record["d"]
+            doc.pop("_id", None)
+            batch = batches.setdefault(name, [])
+            batch.append(ReplaceOne({key: doc[key] for key in keys}, doc, upsert=True))
+            if len(batch) >= batch_size:
+                await flush(name)
+
+    for name in list(batches):
+        await flush(name)
+    progress.report(final=True)
+    return progress.counts
+
+
+async def _run(args) -> Dict[str, int]:
+    client = AsyncIOMotorClient(args.url, **mongo_client_options())
+    try:
+        database = client[args.database]
+        if args.command == "export":
+            return await export_collections(database, args.path, args.collections or DEFAULT_COLLECTIONS,
+                                            batch_size=args.batch_size)
+        return await import_collections(database, args.path, args.collections,
+                                        batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export or import GrebBot subscription collections as NDJSON")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="NDJSON file (gzip-compressed if it ends in .gz)")
+    parser.add_argument("--database", required=True,
+                        help="Database to read from / write to, e.g. grebbot_db or grebbot_db_test")
+    parser.add_argument("--url", default=os.getenv('MONGODB_URL', 'mongodb://localhost:27017'),
+                        help="MongoDB connection string (default $MONGODB_URL)")
+    parser.add_argument("--collections", nargs="+", choices=sorted(COLLECTION_KEYS),
+                        help="Collections to transfer (export default: the two subscription "
+                             "collections; import default: everything in the file)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per cursor batch / bulk_write")
+    parser.add_argument("--dry-run", action="store_true", help="Import: read and validate the file without writing")
+    args = parser.parse_args(argv)
+
+    asyncio.run(_run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
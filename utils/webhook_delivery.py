@@ -0,0 +1,137 @@
+"""Notification delivery over channel webhooks.
+
+Webhook executions are rate limited per webhook rather than against the bot's
+global and per-channel buckets, so sending notifications this way keeps them
+from competing with command replies. Requests go through a dedicated pooled
+aiohttp session with its own per-webhook rate-limit tracking.
+
+``DISCORD_WEBHOOK_API_BASE`` points the client at another server, e.g. the
+local stand-in in ``benchmarks/webhook_stub.py``.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://discord.com/api/v10"
+MAX_RETRIES = 3
+
+
+class WebhookError(Exception):
+    """Discord rejected a webhook execution"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class WebhookGone(WebhookError):
+    """The webhook was deleted or its token revoked; the caller should fall back to the bot"""
+
+
+class WebhookBucket:
+    """Rate-limit state for one webhook, from the X-RateLimit-* response headers"""
+    __slots__ = ("lock", "remaining", "reset_at", "requests", "rate_limited", "slept")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.slept = 0.0
+
+
+class WebhookDelivery:
+    """Executes webhooks over its own connection pool"""
+
+    def __init__(self, api_base: Optional[str] = None, pool_size: int = 20, timeout: float = 10.0):
+        self.api_base = (api_base or os.getenv('DISCORD_WEBHOOK_API_BASE', DEFAULT_API_BASE)).rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._buckets: Dict[int, WebhookBucket] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _sleep(self, bucket: WebhookBucket, delay: float):
+        if delay > 0:
+            bucket.slept += delay
+            await asyncio.sleep(delay)
+
+    async def execute(self, webhook_id: int, token: str, payload: Dict):
+        """POST a message to a webhook, honouring its rate limit and retrying 429s"""
+        bucket = self._buckets.setdefault(webhook_id, WebhookBucket())
+        url = f"{self.api_base}/webhooks/{webhook_id}/{token}"
+
+        # One request per webhook at a time keeps the remaining/reset bookkeeping exact
+        async with bucket.lock:
+            for attempt in range(MAX_RETRIES + 1):
+                if bucket.remaining == 0:
+                    await self._sleep(bucket, bucket.reset_at - time.monotonic())
+
+                bucket.requests += 1
+                async with self._get_session().post(url, json=payload) as response:
+                    remaining = response.headers.get("X-RateLimit-Remaining")
+                    reset_after = response.headers.get("X-RateLimit-Reset-After")
+                    if remaining is not None:
+                        bucket.remaining = int(remaining)
+                    if reset_after is not None:
+                        bucket.reset_at = time.monotonic() + float(reset_after)
+
+                    if response.status < 300:
+                        return
+                    if response.status == 429:
+                        bucket.rate_limited += 1
+                        try:
+                            data = await response.json(content_type=None)
+                            retry_after = float(data.get("retry_after", 1.0))
+                        except (ValueError, aiohttp.ContentTypeError):
+                            retry_after = float(response.headers.get("Retry-After", 1.0))
+                        logger.warning(f"Webhook {webhook_id} rate limited, retrying in {retry_after:.2f}s")
+                        await self._sleep(bucket, retry_after)
+                        continue
+
+                    text = await response.text()
+                    if response.status in (401, 404):
+                        self._buckets.pop(webhook_id, None)
+                        raise WebhookGone(response.status, text)
+                    raise WebhookError(response.status, text)
+
+            raise WebhookError(429, f"Still rate limited after {MAX_RETRIES} retries")
+
+    async def send_embed(self, webhook_id: int, token: str, embed_dict: Dict,
+                         username: Optional[str] = None, avatar_url: Optional[str] = None):
+        payload: Dict = {"embeds": [embed_dict]}
+        if username:
+            payload["username"] = username
+        if avatar_url:
+            payload["avatar_url"] = avatar_url
+        await self.execute(webhook_id, token, payload)
+
+    def stats(self) -> Dict[int, Dict]:
+        """Per-webhook request, 429 and sleep counters"""
+        return {
+            webhook_id: {
+                "requests": bucket.requests,
+                "rate_limited": bucket.rate_limited,
+                "slept_seconds": round(bucket.slept, 3),
+                "remaining": bucket.remaining,
+            }
+            for webhook_id, bucket in self._buckets.items()
+        }
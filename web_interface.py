@@ -1,14 +1,29 @@
 from flask import Flask, render_template, jsonify, request, redirect, url_for
 from flask_socketio import SocketIO, emit
 import asyncio
+import concurrent.futures
 import threading
 import json
+import logging
 import os
+from collections import deque
 from datetime import datetime
+from functools import wraps
 from dotenv import load_dotenv
 
+# Before the utils imports: some of them read their settings at import time
 load_dotenv()
 
+from utils.event_stats import event_stats
+from utils.health import health_probe
+from utils.help_catalog import help_catalog
+from utils.loop_watchdog import watchdog as loop_watchdog
+from utils.memory_diagnostics import memory_diagnostics
+from utils.profiler import MAX_DURATION as MAX_PROFILE_DURATION, profiler
+from utils.ratelimit_telemetry import telemetry as ratelimit_telemetry
+
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
 socketio = SocketIO(app, cors_allowed_origins="*")
@@ -16,35 +31,66 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Global variable to store bot instance
 bot_instance = None
 
+# Initialize web interface instance
+web_interface = None
+
+# Debug endpoints are disabled unless a token is configured
+DEBUG_API_TOKEN = os.getenv('DEBUG_API_TOKEN')
+
+def debug_endpoint(view):
+    """Require the X-Debug-Token header to match DEBUG_API_TOKEN"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not DEBUG_API_TOKEN:
+            return jsonify({'error': 'Debug endpoints are disabled (set DEBUG_API_TOKEN)'}), 403
+        if request.headers.get('X-Debug-Token') != DEBUG_API_TOKEN:
+            return jsonify({'error': 'Invalid debug token'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def call_on_bot_loop(func, *args, timeout: float = 5.0):
+    """Run ``func`` on the bot's event loop and wait for its result (for state the loop mutates)"""
+    async def call():
+        return func(*args)
+    return asyncio.run_coroutine_threadsafe(call(), bot_instance.loop).result(timeout)
+
 class BotWebInterface:
-    def __init__(self, bot):
-        global bot_instance
+    def __init__(self, bot, logs=None):
+        global bot_instance, web_interface
         bot_instance = bot
+        web_interface = self
         self.bot = bot
-        self.logs = []
+        self.logs = deque(logs or [], maxlen=100)  # Keep only last 100 logs (restored after a restart)
 
     def add_log(self, message, level="INFO"):
-        """Add a log entry"""
+        """Add a log entry (called from the logging listener thread, never the bot loop)"""
         log_entry = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'level': level,
             'message': message
         }
         self.logs.append(log_entry)
-        if len(self.logs) > 100:  # Keep only last 100 logs
-            self.logs.pop(0)
 
         # Emit to connected clients
         socketio.emit('new_log', log_entry)
 
-# Initialize web interface instance
-web_interface = None
-
 @app.route('/')
 def dashboard():
     """Main dashboard page"""
     return render_template('dashboard.html')
 
+@app.route('/healthz')
+def healthz():
+    """Liveness: the bot loop is still refreshing the health record (never touches Discord or MongoDB)"""
+    liveness = health_probe.liveness()
+    return jsonify(liveness), 200 if liveness['alive'] else 503
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: gateway READY, loop lag, MongoDB and log backlog from the cached health record"""
+    readiness = health_probe.readiness()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
 @app.route('/api/bot/status')
 def bot_status():
     """Get bot status information"""
@@ -73,21 +119,173 @@ def bot_commands():
     if not bot_instance:
         return jsonify({'error': 'Bot not initialized'})
 
-    commands = []
-    for command in bot_instance.commands:
-        commands.append({
-            'name': command.name,
-            'description': command.help or 'No description available',
-            'cog': command.cog.qualified_name if command.cog else 'No Cog'
-        })
+    # Cached catalog, rebuilt only after a cog reload
+    commands = [{
+        'name': info.name,
+        'usage': info.usage,
+        'description': info.description,
+        'cog': info.category,
+        'admin_only': info.admin_only,
+    } for info in help_catalog.commands(bot_instance)]
 
     return jsonify({'commands': commands})
 
+@app.route('/api/ratelimits')
+def get_ratelimits():
+    """Discord HTTP rate-limit telemetry: per-route requests, 429s, retry sleeps and bucket quota"""
+    data = ratelimit_telemetry.snapshot()
+
+    # Webhook deliveries have their own per-webhook limits
+    subscription_manager = bot_instance.get_cog('SubscriptionManager') if bot_instance else None
+    if subscription_manager:
+        data['webhooks'] = {str(k): v for k, v in subscription_manager.webhook_delivery.stats().items()}
+    return jsonify(data)
+
+@app.route('/api/db/health')
+def get_db_health():
+    """MongoDB health: last ping, circuit breaker state and its recent transitions"""
+    subscription_manager = bot_instance.get_cog('SubscriptionManager') if bot_instance else None
+    if not subscription_manager:
+        return jsonify({'error': 'Subscription manager not loaded'})
+    data = subscription_manager.mongo_health.stats()
+    if subscription_manager.local_store:
+        data['local_store'] = subscription_manager.local_store.stats()
+        data['local_store']['last_reconcile'] = subscription_manager.last_reconcile
+    return jsonify(data)
+
+@app.route('/api/analytics')
+def get_analytics():
+    """Play-session totals and leaderboards per guild, from the in-memory aggregates"""
+    play_sessions = bot_instance.get_cog('PlaySessions') if bot_instance else None
+    if not play_sessions:
+        return jsonify({'error': 'Play session tracking not loaded'})
+
+    guild_id = request.args.get('guild_id', type=int)
+
+    def summarize():
+        # Runs on the bot loop: leaderboards iterate (and cache) stats the presence handlers update
+        guild_ids = [guild_id] if guild_id else list(play_sessions.stats)
+        summaries = []
+        for gid in guild_ids:
+            summary = play_sessions.guild_summary(gid)
+            guild = bot_instance.get_guild(gid)
+            summary['name'] = guild.name if guild else None
+            summaries.append(summary)
+        return summaries
+
+    try:
+        guilds = call_on_bot_loop(summarize)
+    except concurrent.futures.TimeoutError:
+        return jsonify({'error': 'Bot is busy, try again'}), 503
+    guilds.sort(key=lambda g: g['hours'], reverse=True)
+
+    return jsonify({
+        'guilds': guilds,
+        'buffered_events': len(play_sessions.pending_events),
+        'dropped_events': play_sessions.dropped_events,
+        'last_flush': play_sessions.last_flush
+    })
+
+@app.route('/api/sailing')
+def get_sailing():
+    """Members playing a tracked game right now, per guild, from the live presence index"""
+    presence_changes = bot_instance.get_cog('PresenceChanges') if bot_instance else None
+    if not presence_changes:
+        return jsonify({'error': 'Presence tracking not loaded'})
+
+    def summarize():
+        # Runs on the bot loop: presence handlers add to and remove from these member sets
+        guilds = {}
+        for (guild_id, game), members in presence_changes.playing.items():
+            entry = guilds.setdefault(guild_id, {'guild_id': str(guild_id), 'games': {}, 'total': 0})
+            entry['games'][game] = len(members)
+            entry['total'] += len(members)
+        for guild_id, entry in guilds.items():
+            guild = bot_instance.get_guild(guild_id)
+            entry['name'] = guild.name if guild else None
+        return list(guilds.values())
+
+    try:
+        guilds = call_on_bot_loop(summarize)
+    except concurrent.futures.TimeoutError:
+        return jsonify({'error': 'Bot is busy, try again'}), 503
+
+    return jsonify({
+        'total': sum(entry['total'] for entry in guilds),
+        'guilds': sorted(guilds, key=lambda entry: entry['total'], reverse=True)
+    })
+
+@app.route('/api/loop')
+def get_loop_stats():
+    """Event loop lag histogram and the stacks captured while the loop was blocked"""
+    return jsonify(loop_watchdog.stats())
+
+@app.route('/api/debug/profile')
+@debug_endpoint
+def get_profile():
+    """Sampling profiler status and the summary of the last run"""
+    return jsonify(profiler.status())
+
+@app.route('/api/debug/profile', methods=['POST'])
+@debug_endpoint
+def start_profile():
+    """Start sampling every thread for {"seconds": N}; poll GET for the result"""
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds must be a number'}), 400
+    if not 1 <= seconds <= MAX_PROFILE_DURATION:
+        return jsonify({'error': f'seconds must be between 1 and {MAX_PROFILE_DURATION}'}), 400
+    if not profiler.start(seconds):
+        return jsonify({'error': 'A profile is already running'}), 409
+    return jsonify({'success': True, 'seconds': seconds})
+
+@app.route('/api/debug/memory')
+@debug_endpoint
+def get_memory():
+    """tracemalloc / gc status and the list of named snapshots; ?types=1 adds live object counts"""
+    data = memory_diagnostics.status()
+    if request.args.get('types'):
+        data['object_counts'] = memory_diagnostics.object_counts()
+    return jsonify(data)
+
+@app.route('/api/debug/memory', methods=['POST'])
+@debug_endpoint
+def memory_action():
+    """{"action": "start" | "stop" | "snapshot" (+ "name") | "diff" (+ "before", "after", optional "group_by")}"""
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action == 'start':
+        memory_diagnostics.start()
+        return jsonify({'success': True})
+    if action == 'stop':
+        memory_diagnostics.stop()
+        return jsonify({'success': True})
+    if action == 'snapshot':
+        return jsonify(memory_diagnostics.snapshot(data.get('name')))
+    if action == 'diff':
+        group_by = data.get('group_by', 'lineno')
+        if group_by not in ('lineno', 'filename'):
+            return jsonify({'error': 'group_by must be lineno or filename'}), 400
+        try:
+            return jsonify(memory_diagnostics.diff(data.get('before'), data.get('after'), group_by=group_by))
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 404
+    return jsonify({'error': 'Unknown action'}), 400
+
+@app.route('/api/events/stats')
+def get_event_stats():
+    """Gateway events per second by type and for the noisiest guilds, plus time spent per listener and cog"""
+    top = min(request.args.get('top', 10, type=int), 100)
+    guild_names = {guild.id: guild.name for guild in bot_instance.guilds} if bot_instance else None
+    return jsonify(event_stats.snapshot(top=top, guild_names=guild_names))
+
 @app.route('/api/logs')
 def get_logs():
     """Get bot logs"""
     if web_interface:
-        return jsonify({'logs': web_interface.logs})
+        return jsonify({'logs': list(web_interface.logs)})
     return jsonify({'logs': []})
 
 @app.route('/guilds')
@@ -136,7 +334,7 @@ def handle_connect():
 
 def run_web_interface(host='127.0.0.1', port=5000, debug=False):
     """Run the Flask web interface"""
-    print(f"🌐 Starting web interface at http://{host}:{port}")
+    logger.info(f"🌐 Starting web interface at http://{host}:{port}")
     socketio.run(app, host=host, port=port, debug=debug, allow_unsafe_werkzeug=True)
 
 if __name__ == '__main__':